@@ -16,7 +16,19 @@ datas = [
     ("./images/loading.gif", "./images/"),
 ]
 
-hiddenimports = collect_submodules('plyer.platforms.win')
+# These are imported on first use through lazy_import(), which the analyzer can't follow.
+hiddenimports = collect_submodules('plyer.platforms.win') + [
+    'ollama',
+    'httpx',
+    'requests',
+    'pystray',
+    'PIL.Image',
+    'plyer',
+    'playsound',
+    # Optional, bundled when installed in the build environment.
+    'psutil',
+    'PySide6.QtMultimedia',
+]
 
 a = Analysis(
     ['./impclip.py'],
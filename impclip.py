@@ -1,44 +1,104 @@
-import io
-import zipfile
-import psutil
+import time
+STARTUP_T0 = time.perf_counter()
+import asyncio
+import json
+import hashlib
+import re
+import difflib
+import importlib
+import sqlite3
 import pyperclip
-import ollama
 import argparse
 import threading
-import time
+import queue
 import signal
 import sys
 import logging
+import logging.handlers
 from pathlib import Path
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, CancelledError
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
 import shutil
+import tempfile
 import platform
 import subprocess
 import os
 import keyboard
-from plyer import notification
-from pystray import Icon, MenuItem, Menu
-from PIL import Image
 from PySide6.QtWidgets import QApplication, QMainWindow, QPlainTextEdit, QLabel, QVBoxLayout, QWidget, QHBoxLayout, \
-    QLineEdit, QCheckBox, QDialog, QPushButton, QStyle, QProgressBar
+    QLineEdit, QCheckBox, QDialog, QPushButton, QStyle, QProgressBar, QListWidget, QListWidgetItem, QComboBox
 from PySide6.QtGui import QFont, QIcon, Qt, QMovie
-from PySide6.QtCore import QTimer, QSize, Signal, Slot, QThread, QObject, QSignalBlocker
-import playsound as ps
-import requests
+from PySide6.QtCore import QTimer, QSize, Signal, Slot, QThread, QObject, QSignalBlocker, QUrl
 
+# ollama, httpx, requests, pystray, PIL, plyer, playsound and QtMultimedia are imported on first use through lazy_import().
 
 class ConsoleOutput(QPlainTextEdit):
+    max_lines = 5000
+
     def __init__(self, parent=None):
         super().__init__(parent=parent)
         self.setReadOnly(True)
         self.setFont(QFont("Consolas", 11))
+        self.setMaximumBlockCount(self.max_lines)
 
     def write(self, message):
+        self.moveCursor(self.textCursor().MoveOperation.End)
         self.insertPlainText(message)
         self.verticalScrollBar().setValue(self.verticalScrollBar().maximum())
 
     def flush(self):
         pass
 
+
+class LogSink(logging.Handler):
+    """
+    Collects log records and stdout/stderr writes from any thread so the window can append them in batches on the
+    Qt thread. Only the newest max_lines entries are kept if the window falls behind.
+    """
+
+    def __init__(self, max_lines=ConsoleOutput.max_lines):
+        super().__init__()
+        self.lines = deque(maxlen=max_lines)
+
+    def emit(self, record):
+        try:
+            self.lines.append(self.format(record) + "\n")
+        except Exception:
+            self.handleError(record)
+
+    def write(self, message):
+        if message:
+            self.lines.append(message)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        batch = []
+        while True:
+            try:
+                batch.append(self.lines.popleft())
+            except IndexError:
+                return batch
+
+class ModelSelector(QComboBox):
+    """Combo box that re-reads the locally available models every time it is opened."""
+
+    def __init__(self, list_models, parent=None):
+        super().__init__(parent=parent)
+        self.list_models = list_models
+
+    def set_models(self, models, current):
+        with QSignalBlocker(self):
+            self.clear()
+            self.addItems(models if current in models else [current] + models)
+            self.setCurrentText(current)
+
+    def showPopup(self):
+        self.set_models(self.list_models(), self.currentText())
+        super().showPopup()
+
+
 class OcliPWindow(QMainWindow):
 
     notifications_button = None
@@ -60,7 +120,14 @@ class OcliPWindow(QMainWindow):
     sys_prompt_label = None
     title = None
     auto_button = None
+    history_button = None
+    model_selector = None
+    memory_label = None
+    memory_timer = None
     signal_download = Signal()
+    # Flag updates come from hotkey, tray and worker threads; the signal queues them onto the GUI thread.
+    flag_changed = Signal(str, object)
+    log_interval = 100
 
     def __init__(self, model, sys_prompt, ollama_path, force_path, app_icon):
         super().__init__()
@@ -69,6 +136,7 @@ class OcliPWindow(QMainWindow):
         self.setWindowTitle("OCliP")
 
         self.signal_download.connect(self.prompt_ollama_download)
+        self.flag_changed.connect(self.update_flag)
 
         self.model = model
         self.sys_prompt = sys_prompt
@@ -136,8 +204,12 @@ class OcliPWindow(QMainWindow):
         self.setup_ui()
 
         self.setStyleSheet(self.textStyle)
-        sys.stdout = self.infoLabel
-        sys.stderr = self.infoLabel
+        self.log_sink = LogSink()
+        sys.stdout = self.log_sink
+        sys.stderr = self.log_sink
+        self.log_timer = QTimer(self)
+        self.log_timer.timeout.connect(self.flush_log)
+        self.log_timer.start(self.log_interval)
 
         QTimer.singleShot(0, self.on_load)
 
@@ -150,7 +222,6 @@ class OcliPWindow(QMainWindow):
 
         self.infoLabel = QLabel("Loading...", alignment=Qt.AlignmentFlag.AlignCenter)
         self.infoLabel.setFont(QFont("Consolas", 11, weight=2))
-        self.infoLabel.write = self.info_write  # attach custom method
 
     def setup_ui(self):
         self.widget = QWidget()
@@ -163,14 +234,14 @@ class OcliPWindow(QMainWindow):
 
         self.setCentralWidget(self.widget)
 
-    def info_write(self, x):
-        try:
-            msg = x[:-1].split("]")[1] if "]" in x else x
-            self.infoLabel.setText(msg)
-        except Exception as e:
-            self.infoLabel.setText(x)
-            self.console.write(str(e))
-        self.console.write(x)
+    @Slot()
+    def flush_log(self):
+        batch = self.log_sink.drain()
+        if not batch:
+            return
+        last = batch[-1].strip()
+        self.infoLabel.setText(last.split("]", 1)[1].strip() if "]" in last else last)
+        self.console.write("".join(batch))
 
     @Slot()
     def on_load(self):
@@ -179,13 +250,19 @@ class OcliPWindow(QMainWindow):
             self.sys_prompt,
             self.ollama_path,
             self.force_path,
-            self.update_flag,
+            self.flag_changed.emit,
             self.signal_download
         )
+        if self.impClip.speculator is not None:
+            QApplication.clipboard().dataChanged.connect(self.clipboard_changed)
         self.worker = WorkerThread(self.impClip)
         self.worker.finished.connect(self.change_screen)
         self.worker.start()
 
+    @Slot()
+    def clipboard_changed(self):
+        self.impClip.on_clipboard_changed(QApplication.clipboard().text())
+
     @Slot()
     def prompt_ollama_download(self):
         download = DownloadDialog()
@@ -196,9 +273,6 @@ class OcliPWindow(QMainWindow):
 
     @Slot(bool)
     def change_screen(self, _):
-        sys.stdout = self.console
-        sys.stderr = self.console
-
         self.layout.removeWidget(self.movieLabel)
         self.layout.removeWidget(self.infoLabel)
 
@@ -210,11 +284,12 @@ class OcliPWindow(QMainWindow):
         self.sys_prompt_label.setFont(QFont("Consolas", 14))
         self.sys_prompt_label.setText("System Prompt")
         self.sys_prompt_input = QLineEdit(clearButtonEnabled=True)
-        self.sys_prompt_input.setText(self.impClip.sys_prompt)
-        self.sys_prompt_input.setCursorPosition(-len(self.impClip.sys_prompt))
+        self.sys_prompt_input.setToolTip("Write line breaks as \\n.")
+        self.sys_prompt_input.setText(escape_config_value(self.impClip.sys_prompt))
+        self.sys_prompt_input.setCursorPosition(0)
 
         def update_prompt():
-            self.impClip.set_sys_prompt(self.sys_prompt_input.text())
+            self.impClip.set_sys_prompt(unescape_config_value(self.sys_prompt_input.text()))
             self.impClip.update_config()
 
         self.sys_prompt_input.editingFinished.connect(update_prompt)
@@ -241,12 +316,31 @@ class OcliPWindow(QMainWindow):
         self.checkrows.addWidget(self.auto_button)
         self.checkrows.addWidget(self.monitor_button)
         self.checkrows.addWidget(self.notifications_button)
+        if self.impClip.history is not None:
+            self.history_button = QPushButton("History")
+            self.history_button.setToolTip("Search past improvements.")
+            self.history_button.clicked.connect(self.show_history)
+            self.checkrows.addWidget(self.history_button)
 
         self.top_row = QHBoxLayout()
         self.sys_p_layout = QVBoxLayout()
         self.sys_p_layout.addWidget(self.sys_prompt_label)
         self.sys_p_layout.addWidget(self.sys_prompt_input)
 
+        self.model_selector = ModelSelector(self.impClip.local_models)
+        self.model_selector.setToolTip("Switch model. The new model is loaded in the background first.")
+        self.model_selector.set_models(self.impClip.local_models(), self.impClip.model_name)
+        self.model_selector.currentTextChanged.connect(self.impClip.switch_model)
+        self.sys_p_layout.addWidget(self.model_selector)
+
+        if self.impClip.governor is not None:
+            self.memory_label = QLabel()
+            self.memory_label.setFont(QFont("Consolas", 10))
+            self.sys_p_layout.addWidget(self.memory_label)
+            self.memory_timer = QTimer(self)
+            self.memory_timer.timeout.connect(lambda: self.memory_label.setText(self.impClip.memory_status))
+            self.memory_timer.start(1000)
+
         self.top_row.addWidget(self.title)
         self.top_row.addLayout(self.checkrows)
         self.top_row.addLayout(self.sys_p_layout)
@@ -257,23 +351,46 @@ class OcliPWindow(QMainWindow):
         self.loading_screen.stop()
         self.movieLabel.deleteLater()
 
+    @Slot()
+    def show_history(self):
+        dialog = HistoryDialog(self.impClip)
+        dialog.setStyleSheet(self.textStyle)
+        dialog.exec()
+        # Outside the dialog the hotkeys go back to acting on the latest entry.
+        self.impClip.select_history(None)
+
     def update_flag(self, flag, val):
         match flag:
             case "auto":
-                with QSignalBlocker(self.auto_button):
-                    self.auto_button.setChecked(val)
+                if self.auto_button is not None:
+                    with QSignalBlocker(self.auto_button):
+                        self.auto_button.setChecked(val)
                 self.impClip.toggle_auto_paste()
                 return
             case "notifications":
-                with QSignalBlocker(self.notifications_button):
-                    self.notifications_button.setChecked(val)
+                if self.notifications_button is not None:
+                    with QSignalBlocker(self.notifications_button):
+                        self.notifications_button.setChecked(val)
                 self.impClip.toggle_notifications()
                 return
             case "monitor":
-                with QSignalBlocker(self.monitor_button):
-                    self.monitor_button.setChecked(val)
+                if self.monitor_button is not None:
+                    with QSignalBlocker(self.monitor_button):
+                        self.monitor_button.setChecked(val)
                 self.impClip.toggle_monitor()
                 return
+            case "sys_prompt":
+                if self.sys_prompt_input is not None:
+                    with QSignalBlocker(self.sys_prompt_input):
+                        self.sys_prompt_input.setText(escape_config_value(val))
+                return
+            case "model":
+                if self.model_selector is not None:
+                    with QSignalBlocker(self.model_selector):
+                        if self.model_selector.findText(val) < 0:
+                            self.model_selector.addItem(val)
+                        self.model_selector.setCurrentText(val)
+                return
             case _:
                 logging.info(f"Unknown Flag: {flag}")
 
@@ -296,6 +413,76 @@ class WorkerThread(QThread):
         self.finished.emit(True)
 
 
+class HistoryDialog(QDialog):
+    def __init__(self, imp):
+        super().__init__()
+        self.imp = imp
+        self.setWindowTitle("History")
+        self.setMinimumSize(600, 400)
+
+        layout = QVBoxLayout()
+        self.search_input = QLineEdit(clearButtonEnabled=True)
+        self.search_input.setPlaceholderText("Search...")
+        self.search_input.textChanged.connect(self.refresh)
+        layout.addWidget(self.search_input)
+
+        self.results = QListWidget()
+        self.results.setFont(QFont("Consolas", 11))
+        self.results.currentItemChanged.connect(self.select)
+        self.results.itemDoubleClicked.connect(lambda item: self.reapply())
+        layout.addWidget(self.results)
+
+        self.preview = QPlainTextEdit(readOnly=True)
+        self.preview.setMaximumHeight(120)
+        layout.addWidget(self.preview)
+
+        buttons = QHBoxLayout()
+        restore_button = QPushButton("Restore Original")
+        restore_button.setToolTip(f"Copy the original text. ({imp.restore_hotkey})")
+        restore_button.clicked.connect(self.restore)
+        reapply_button = QPushButton("Re-apply")
+        reapply_button.setToolTip(f"Copy the improved text. ({imp.reapply_hotkey})")
+        reapply_button.clicked.connect(self.reapply)
+        buttons.addWidget(restore_button)
+        buttons.addWidget(reapply_button)
+        layout.addLayout(buttons)
+
+        self.setLayout(layout)
+        self.refresh("")
+
+    @Slot(str)
+    def refresh(self, query):
+        self.results.clear()
+        for entry in self.imp.history.search(query):
+            label = " ".join(entry["original"].split())
+            item = QListWidgetItem(f"{time.strftime('%d.%m. %H:%M', time.localtime(entry['created']))}  {label[:80]}")
+            item.setData(Qt.ItemDataRole.UserRole, entry)
+            self.results.addItem(item)
+
+    def entry(self):
+        item = self.results.currentItem()
+        return item.data(Qt.ItemDataRole.UserRole) if item is not None else None
+
+    @Slot()
+    def select(self):
+        entry = self.entry()
+        self.imp.select_history(entry["id"] if entry is not None else None)
+        self.preview.setPlainText(entry["improved"] if entry is not None else "")
+
+    @Slot()
+    def restore(self):
+        entry = self.entry()
+        if entry is not None:
+            # Pasting here would only go into this dialog.
+            self.imp.apply_history(entry, "original", paste=False)
+
+    @Slot()
+    def reapply(self):
+        entry = self.entry()
+        if entry is not None:
+            self.imp.apply_history(entry, "improved", paste=False)
+
+
 class DownloadDialog(QDialog):
     def __init__(self, dest_folder="ollama"):
         super().__init__()
@@ -330,11 +517,16 @@ class DownloadDialog(QDialog):
         self.pheight = self.progressBar.height()
 
         def updateProgress(progress):
+            if progress < 0:
+                # Content-Length is unknown, show a busy indicator instead of a percentage.
+                self.progressBar.setRange(0, 0)
+                return
             self.progressBar.setValue(progress)
             r = str(min(int(progress*self.pheight/200), 11))
             self.progressBar.setStyleSheet("QProgressBar::chunk { border-radius: " + r + "px; }")
 
         self.signals.progress.connect(updateProgress)
+        self.signals.status.connect(self.label.setText)
         self.signals.done.connect(self.on_download_done)
 
 
@@ -343,11 +535,14 @@ class DownloadDialog(QDialog):
         if success:
             self.label.setText("Download complete. Ollama is ready to use.")
             self.download_btn.setEnabled(False)
+            self.progressBar.hide()
+            self.accept()
         else:
+            # Keep the dialog open so the partial download can be resumed.
             self.label.setText(f"Download failed: {message}")
+            self.download_btn.setText("Resume")
             self.download_btn.setEnabled(True)
-        self.progressBar.hide()
-        self.accept()
+            self.progressBar.hide()
 
     @Slot()
     def download(self):
@@ -366,44 +561,101 @@ class DownloadDialog(QDialog):
                 url = "https://github.com/ollama/ollama/releases/latest/download/ollama-windows-amd64.zip"
             else:
                 self.signals.done.emit(False, "Unsupported OS.")
-                self.download_btn.setEnabled(True)
                 return
 
+            archive_name = url.rsplit("/", 1)[1]
+            part_pth = Path(f"{self.dest_folder}-{archive_name}.part").resolve()
             try:
-                with requests.get(url, stream=True) as r:
-                    r.raise_for_status()
-                    total = int(r.headers.get('Content-Length', 0))
-                    downloaded = 0
-                    chunks = []
-                    for chunk in r.iter_content(chunk_size=8192):
-                        if chunk:
-                            chunks.append(chunk)
-                            downloaded += len(chunk)
-                            percent = int(downloaded * 100 / total)
-                            self.signals.progress.emit(percent)
-
-                    zip_data = b''.join(chunks)
-                    os.makedirs(self.dest_folder, exist_ok=True)
-                    if url.endswith(".zip"):
-                        with zipfile.ZipFile(io.BytesIO(zip_data)) as z:
-                            z.extractall(self.dest_folder)
-                    elif url.endswith(".tgz") or url.endswith(".tar.gz"):
-                        import tarfile
-                        with tarfile.open(fileobj=io.BytesIO(zip_data), mode="r:gz") as tar:
-                            tar.extractall(self.dest_folder)
-                    else:
-                        raise Exception("Unsupported archive format.")
+                self.fetch(url, part_pth)
+
+                self.signals.status.emit("Verifying checksum...")
+                expected = self.release_checksum(url.rsplit("/", 1)[0] + "/sha256sum.txt", archive_name)
+                if expected is not None:
+                    actual = file_sha256(part_pth)
+                    if actual != expected:
+                        part_pth.unlink(missing_ok=True)
+                        raise Exception(f"Checksum mismatch for {archive_name}, please download again.")
+                else:
+                    logging.warning(f"No published checksum found for {archive_name}, skipping verification.")
+
+                self.signals.status.emit("Extracting...")
+                os.makedirs(self.dest_folder, exist_ok=True)
+                if archive_name.endswith(".zip"):
+                    import zipfile
+                    with zipfile.ZipFile(part_pth) as z:
+                        z.extractall(self.dest_folder)
+                elif archive_name.endswith(".tgz") or archive_name.endswith(".tar.gz"):
+                    import tarfile
+                    with tarfile.open(part_pth, mode="r:gz") as tar:
+                        tar.extractall(self.dest_folder)
+                else:
+                    raise Exception("Unsupported archive format.")
+                part_pth.unlink(missing_ok=True)
 
-                    self.signals.done.emit(True, "Download complete.")
+                self.signals.done.emit(True, "Download complete.")
 
             except Exception as e:
                 self.signals.done.emit(False, f"Failed: {str(e)}")
 
         threading.Thread(target=run, daemon=True).start()
 
+    def fetch(self, url, part_pth):
+        """Streams url into part_pth, resuming from its current size with an HTTP Range request."""
+        offset = part_pth.stat().st_size if part_pth.exists() else 0
+        headers = {"Range": f"bytes={offset}-"} if offset else {}
+        requests = lazy_import("requests")
+        with requests.get(url, stream=True, headers=headers, timeout=30) as r:
+            if r.status_code == 416:
+                # The part file already holds the whole archive.
+                return
+            r.raise_for_status()
+            if r.status_code != 206:
+                offset = 0
+            remaining = int(r.headers.get('Content-Length', 0))
+            total = offset + remaining if remaining else 0
+            if not total:
+                self.signals.progress.emit(-1)
+
+            downloaded = offset
+            start = time.perf_counter()
+            last_update = 0.0
+            with open(part_pth, "ab" if offset else "wb") as f:
+                for chunk in r.iter_content(chunk_size=1024 * 1024):
+                    if not chunk:
+                        continue
+                    f.write(chunk)
+                    downloaded += len(chunk)
+                    now = time.perf_counter()
+                    if now - last_update < 0.25:
+                        continue
+                    last_update = now
+                    rate = (downloaded - offset) / max(now - start, 1e-6)
+                    status = f"Downloading... {downloaded / 2**20:.0f} MB"
+                    if total:
+                        status += f" of {total / 2**20:.0f} MB"
+                        self.signals.progress.emit(int(downloaded * 100 / total))
+                    self.signals.status.emit(f"{status} at {rate / 2**20:.1f} MB/s")
+            if total and downloaded < total:
+                raise Exception(f"Connection closed after {downloaded} of {total} bytes.")
+
+    @staticmethod
+    def release_checksum(url, archive_name):
+        requests = lazy_import("requests")
+        try:
+            r = requests.get(url, timeout=10)
+            r.raise_for_status()
+        except requests.RequestException:
+            return None
+        for line in r.text.splitlines():
+            parts = line.split()
+            if len(parts) == 2 and parts[1].lstrip("*").removeprefix("./") == archive_name:
+                return parts[0].lower()
+        return None
+
 
 class DownloadSignals(QObject):
     progress = Signal(int)
+    status = Signal(str)
     done = Signal(bool, str)
 
 
@@ -414,12 +666,88 @@ class ImproveClipboard:
     installed_ollama_path = shutil.which("ollama")
     ollama_path = str(Path(installed_ollama_path).parent) if installed_ollama_path is not None else "./ollama/"
     monitoring_enabled = True
-    triggered = False
     stop_event = threading.Event()
     notifications_enabled = True
     auto_paste = False
+    stream_output = True
+    stream_paste = False
+    cache_enabled = True
+    cache_max_entries = 256
+    cache_max_age = 7 * 24 * 3600.0
+    cache = None
+    trigger_policy = "coalesce"
+    trigger_policies = ("queue", "coalesce", "cancel")
+    current_job = None
+    chunk_threshold = 4000
+    chunk_size = 2000
+    chunk_parallel = 2
+    chunk_parallel_setting = "auto"
+    engine = "async"
+    engines = ("sync", "async")
+    async_engine = None
+    request_timeout = 60.0
+    metrics_enabled = True
+    metrics_window = 200
+    metrics = None
+    keep_alive = "10m"
+    keep_warm_interval = 0.0
+    ollama_host = "http://127.0.0.1:11434"
+    ollama_host_setting = "auto"
+    ready_timeout = 30.0
+    parallel_startup = True
+    ollama_hosts = []
+    manage_local_server = True
+    health_interval = 10.0
+    pool = None
+    ollama_process = None
+    active_profile = "default"
+    api_mode = "chat"
+    api_modes = ("chat", "generate")
+    router = None
+    router_models = []
+    latency_budget = 3.0
+    history_enabled = True
+    history_max_entries = 1000
+    history = None
+    history_selection = None
+    speculate = False
+    speculate_max_chars = 4000
+    speculate_max_cpu = 50.0
+    speculator = None
+    last_trigger_profile = None
+    fallback_model = ""
+    serving_fallback = None
+    models = None
+    switch_target = None
+    model_list = []
+    model_list_time = 0.0
+    model_list_ttl = 30.0
+    model_list_refreshing = False
+    num_predict_ratio = 1.5
+    num_predict_min = 64
+    num_ctx_min = 2048
+    num_ctx_max = 32768
+    temperature = None
+    stop = []
+    num_ctx_limit = None
+    governor_enabled = False
+    governor_interval = 5.0
+    memory_high = 85.0
+    memory_critical = 95.0
+    ollama_memory_max = 0
+    low_memory_profile = ""
+    governor = None
+    memory_status = ""
+    profile_override = None
+    incremental = True
+    incremental_memory = 8
+    incremental_min_similarity = 0.6
+    last_copied = None
     sys_os = platform.system() 
     tray_icon = None
+    hotkeys_registered = False
+    log_max_bytes = 1024 * 1024
+    log_backups = 3
     app_name = "OCliP"
     tray = None
     thread = None
@@ -435,45 +763,31 @@ class ImproveClipboard:
             ollama_path,
             force_path,
             update_flag,
-            signal_download,):
-
-        signal.signal(signal.SIGINT, self.signal_handler)
-        signal.signal(signal.SIGTERM, self.signal_handler)
+            signal_download,
+            config_dir=None,):
+
+        # With a config_dir the instance is embedded (e.g. the benchmark): its config, cache, history and metrics
+        # live in that directory and the caller owns the process signals.
+        if config_dir is None:
+            signal.signal(signal.SIGINT, self.signal_handler)
+            signal.signal(signal.SIGTERM, self.signal_handler)
         self.setLogger()
 
         self.model_name = model_name
         self.sys_prompt = sys_prompt
-        self.config_pth = Path("./oclip.cfg").resolve().absolute()
+        self.config_pth = Path(config_dir or ".").resolve().absolute() / "oclip.cfg"
 
         self.notif_hotkey = "ctrl+n"
         self.monitor_hotkey = "ctrl+m"
         self.trigger_hotkey = "ctrl+c"
         self.auto_paste_hotkey = "ctrl+shift+a"
+        self.cancel_hotkey = "ctrl+shift+x"
+        self.restore_hotkey = "ctrl+alt+shift+z"
+        self.reapply_hotkey = "ctrl+alt+shift+r"
 
-        lines = self.get_config()
-        if self.model_name is None:
-            self.model_name = lines.get("model", self.default_model_name)
-        self.sys_postfix = lines.get("sys_postfix", self.sys_postfix)
-        if self.sys_prompt is None:
-            self.sys_prompt = lines.get("sys_prompt", self.default_sys_prompt)
-        self.notif_hotkey = lines.get("notif_hotkey", self.notif_hotkey)
-        self.monitor_hotkey = lines.get("monitor_hotkey", self.monitor_hotkey)
-        self.auto_paste_hotkey = lines.get("auto_paste_hotkey", self.auto_paste_hotkey)
-
-        with open(self.config_pth, "w") as f:
-            f.write("### OCliP Configuration File\n")
-            f.write("# Ollama model name. Please ensure that the model actually exists in the Ollama Repo.\n")
-            f.write(f"model={self.model_name}\n")
-            f.write("# System prompt to use for model output (needs to be in one line).\n")
-            f.write(f"sys_prompt={self.sys_prompt}\n")
-            f.write("# System prompt postfix.\n")
-            f.write(f"sys_postfix={self.sys_postfix}\n")
-            f.write("# Notification toggle hotkey.\n")
-            f.write(f"notif_hotkey={self.notif_hotkey}\n")
-            f.write("# Clipboard monitoring toggle hotkey.\n")
-            f.write(f"monitor_hotkey={self.monitor_hotkey}\n")
-            f.write("# Auto Paste toggle hotkey.\n")
-            f.write(f"auto_paste_hotkey={self.auto_paste_hotkey}\n")
+        self.config = ConfigStore(self.config_pth)
+        self.apply_config(self.config.values, initial=True)
+        self.update_config()
 
         self.force_path = force_path
         self.update_flag = update_flag
@@ -485,12 +799,48 @@ class ImproveClipboard:
             self.app_icon = str(resource_path("./icons/icon.png"))
         
         self.notif_audio = str(resource_path("./sounds/notify.mp3"))
+        self.notifier = Notifier(self.app_name, self.app_icon, self.notif_audio, self.load_sound_player())
 
         self.user_ollama_path = ollama_path
+        self.jobs = queue.Queue()
+        self.job_lock = threading.Lock()
+        self.capturing = threading.Event()
+        self.model_ready = threading.Event()
+        self.prompt_cache = PromptCacheStats()
+        if self.router_models:
+            self.router = ModelRouter(self.router_models, self.latency_budget)
+        if self.metrics_enabled:
+            self.metrics = LatencyMetrics(self.config_pth.parent / "metrics.jsonl", self.metrics_window)
+
+        if self.cache_enabled:
+            self.cache = ResponseCache(
+                self.config_pth.parent / "cache",
+                self.cache_max_entries,
+                self.cache_max_age
+            )
+            self.cache.set_scope(self.model_name, self.sys_prompt + self.sys_postfix)
+
+        if self.history_enabled:
+            try:
+                self.history = HistoryStore(self.config_pth.parent / "history.db", self.history_max_entries)
+            except Exception as e:
+                logging.warning(f"Couldn't open history, continuing without it:\n{e}")
+
+        self.segments = SegmentMemory(self.incremental_memory)
+        if self.speculate and self.trigger_hotkey.replace(" ", "").lower() == "ctrl+c":
+            logging.info("Speculation is off: with ctrl+c as trigger_hotkey every copy already starts a request.")
+        elif self.speculate and self.cache is None:
+            logging.info("Speculation is off: its results are handed over through the response cache, enable cache.")
+        elif self.speculate:
+            self.speculator = Speculator(self)
 
     def initialize(self):
         try:
             self.checkForOllama(self.user_ollama_path)
+            startup.mark("ollama found")
+            if self.parallel_startup:
+                # Hotkeys and the tray come up while the model is pulled and loaded; the monitor waits on model_ready.
+                self.start_frontend()
             self.initOllama()
         except OllamaNotFoundException as e:
             logging.critical(f"Error while checking for Ollama. Are you sure it's installed?\n{e}")
@@ -499,6 +849,25 @@ class ImproveClipboard:
             logging.critical(f"Error initializing Ollama client!\n{e}")
             self.exit_app(-1)
 
+        self.model_ready.set()
+        startup.mark("model ready")
+        if not self.parallel_startup:
+            self.start_frontend()
+        self.start_keep_warm()
+        if self.governor_enabled:
+            # Capping or unloading only frees memory when the server runs on this machine.
+            if not any(is_local_host(backend.host) for backend in self.pool.backends):
+                logging.info("Memory governor disabled, no local Ollama server.")
+            else:
+                try:
+                    self.governor = MemoryGovernor(self)
+                    self.governor.start()
+                except ImportError:
+                    logging.warning("Memory governor disabled, it needs psutil (pip install psutil).")
+        self.config.watch(self.on_config_reloaded, self.stop_event)
+        startup.report()
+
+    def start_frontend(self):
         self.tray_icon = self.make_tray_icon()
         self.tray = threading.Thread(
             target=self.tray_icon.run,
@@ -506,11 +875,17 @@ class ImproveClipboard:
             name="TrayIcon"
         )
         self.tray.start()
+        startup.mark("tray")
         self.setup_hotkey()
         self.thread = self.start_clipboard_monitor()
         self.thread.start()
+        startup.mark("first usable hotkey")
         
     def checkForOllama(self, ollama_path):
+        if not self.manage_local_server or not is_local_host(self.ollama_host):
+            logging.info(f"Not managing a local Ollama server, using {', '.join(self.hosts())}.")
+            self.ollama_started = True
+            return
         if self.is_ollama_running() and not self.force_path:
             logging.info("Ollama is already running; Use --force-path to force specified path.")
             self.ollama_started = True
@@ -556,80 +931,299 @@ class ImproveClipboard:
         self.update_config()
         self.stop_threads()
 
-    def get_config(self):
+    def apply_config(self, lines, initial=False):
+        # On startup, --model and --sys-prompt take precedence over the file.
+        if not initial or self.model_name is None:
+            self.model_name = lines.get("model", self.model_name or self.default_model_name)
+        self.sys_postfix = lines.get("sys_postfix", self.sys_postfix)
+        if not initial or self.sys_prompt is None:
+            self.sys_prompt = lines.get("sys_prompt", self.sys_prompt or self.default_sys_prompt)
+        self.notif_hotkey = lines.get("notif_hotkey", self.notif_hotkey)
+        self.monitor_hotkey = lines.get("monitor_hotkey", self.monitor_hotkey)
+        self.auto_paste_hotkey = lines.get("auto_paste_hotkey", self.auto_paste_hotkey)
+        self.trigger_hotkey = lines.get("trigger_hotkey", self.trigger_hotkey)
+        self.stream_output = str_to_bool(lines.get("stream", self.stream_output))
+        self.stream_paste = str_to_bool(lines.get("stream_paste", self.stream_paste))
+        self.cache_enabled = str_to_bool(lines.get("cache", self.cache_enabled))
+        self.cache_max_entries = config_number(lines, "cache_max_entries", self.cache_max_entries)
+        self.cache_max_age = config_number(lines, "cache_max_age", self.cache_max_age, float)
+        self.trigger_policy = lines.get("trigger_policy", self.trigger_policy)
+        if self.trigger_policy not in self.trigger_policies:
+            logging.info(f"Unknown trigger policy '{self.trigger_policy}', using 'coalesce'.")
+            self.trigger_policy = "coalesce"
+        self.chunk_threshold = config_number(lines, "chunk_threshold", self.chunk_threshold)
+        self.chunk_size = config_number(lines, "chunk_size", self.chunk_size, minimum=1)
+        # "auto" is what gets saved, so OLLAMA_NUM_PARALLEL and OLLAMA_HOST are followed on every launch instead of
+        # being frozen into the file the first time.
+        self.chunk_parallel_setting = str(lines.get("chunk_parallel", self.chunk_parallel_setting)).strip() or "auto"
+        if self.chunk_parallel_setting.lower() == "auto":
+            self.chunk_parallel = config_number(os.environ, "OLLAMA_NUM_PARALLEL", ImproveClipboard.chunk_parallel,
+                                                minimum=1)
+        else:
+            self.chunk_parallel = config_number(lines, "chunk_parallel", self.chunk_parallel, minimum=1)
+        self.engine = lines.get("engine", self.engine)
+        if self.engine not in self.engines:
+            logging.info(f"Unknown engine '{self.engine}', using 'async'.")
+            self.engine = "async"
+        self.request_timeout = config_number(lines, "request_timeout", self.request_timeout, float)
+        self.cancel_hotkey = lines.get("cancel_hotkey", self.cancel_hotkey)
+        self.restore_hotkey = lines.get("restore_hotkey", self.restore_hotkey)
+        self.reapply_hotkey = lines.get("reapply_hotkey", self.reapply_hotkey)
+        self.history_enabled = str_to_bool(lines.get("history", self.history_enabled))
+        self.history_max_entries = config_number(lines, "history_max_entries", self.history_max_entries, minimum=1)
+        self.fallback_model = lines.get("fallback_model", self.fallback_model).strip()
+        self.governor_enabled = str_to_bool(lines.get("memory_governor", self.governor_enabled))
+        self.governor_interval = config_number(lines, "memory_interval", self.governor_interval, float, 0.5)
+        self.memory_high = config_number(lines, "memory_high", self.memory_high, float)
+        self.memory_critical = config_number(lines, "memory_critical", self.memory_critical, float)
+        self.ollama_memory_max = config_number(lines, "ollama_memory_max", self.ollama_memory_max, float)
+        self.low_memory_profile = lines.get("low_memory_profile", self.low_memory_profile).strip()
+        self.num_predict_ratio = config_number(lines, "num_predict_ratio", self.num_predict_ratio, float)
+        self.num_predict_min = config_number(lines, "num_predict_min", self.num_predict_min)
+        self.num_ctx_min = config_number(lines, "num_ctx_min", self.num_ctx_min)
+        self.num_ctx_max = config_number(lines, "num_ctx_max", self.num_ctx_max, minimum=self.num_ctx_min)
+        temperature = lines.get("temperature", "" if self.temperature is None else self.temperature)
         try:
-            with open(self.config_pth, "r") as f:
-                lines = {}
-                for line in f:
-                    if "=" in line and not line.startswith("#"):
-                        key, val = line.strip().split("=", 1)
-                        lines[key] = val
-            return lines
-        except Exception as e:
-            return {}
-
-    def update_config(self):
-        lines = self.get_config()
-        mn = lines.get("model", self.model_name)
-        spfx = lines.get("sys_postfix", self.sys_postfix)
-        sp = lines.get("sys_prompt", self.sys_prompt)
-        n = lines.get("notif_hotkey", self.notif_hotkey)
-        m = lines.get("monitor_hotkey", self.monitor_hotkey)
-        a = lines.get("auto_paste_hotkey", self.auto_paste_hotkey)
-        with open(self.config_pth, "w") as f:
-            f.write("### OCliP Configuration File\n")
-
-            f.write("# Ollama model name. Please ensure that the model actually exists in the Ollama Repo.\n")
-            if self.model_name != mn:
-                f.write(f"model={self.model_name}\n")
-            else:
-                f.write(f"model={mn}\n")
-
-            f.write("# System prompt to use for model output (needs to be in one line).\n")
-            if self.sys_prompt != sp:
-                f.write(f"sys_prompt={self.sys_prompt}\n")
-            else:
-                f.write(f"sys_prompt={sp}\n")
+            self.temperature = float(temperature) if str(temperature).strip() else None
+        except ValueError:
+            logging.warning(f"Invalid temperature '{temperature}', keeping {self.temperature}.")
+        self.stop = [unescape_config_value(s) for s in lines.get("stop", ",".join(self.stop)).split(",") if s]
+        self.incremental = str_to_bool(lines.get("incremental", self.incremental))
+        self.incremental_memory = config_number(lines, "incremental_memory", self.incremental_memory, minimum=1)
+        self.incremental_min_similarity = config_number(lines, "incremental_min_similarity",
+                                                        self.incremental_min_similarity, float)
+        self.speculate = str_to_bool(lines.get("speculate", self.speculate))
+        self.speculate_max_chars = config_number(lines, "speculate_max_chars", self.speculate_max_chars)
+        self.speculate_max_cpu = config_number(lines, "speculate_max_cpu", self.speculate_max_cpu, float)
+        self.metrics_enabled = str_to_bool(lines.get("metrics", self.metrics_enabled))
+        self.metrics_window = config_number(lines, "metrics_window", self.metrics_window, minimum=1)
+        self.keep_alive = parse_keep_alive(lines.get("keep_alive", self.keep_alive))
+        self.keep_warm_interval = config_number(lines, "keep_warm_interval", self.keep_warm_interval, float)
+        self.ollama_host_setting = lines.get("ollama_host", self.ollama_host_setting).strip() or "auto"
+        if self.ollama_host_setting.lower() == "auto":
+            self.ollama_host = normalize_host(os.environ.get("OLLAMA_HOST") or ImproveClipboard.ollama_host)
+        else:
+            self.ollama_host = normalize_host(self.ollama_host_setting)
+        self.ready_timeout = config_number(lines, "ready_timeout", self.ready_timeout, float)
+        self.ollama_hosts = [normalize_host(h) for h in lines.get("ollama_hosts", "").split(",") if h.strip()]
+        self.manage_local_server = str_to_bool(lines.get("manage_local_server", self.manage_local_server))
+        self.health_interval = config_number(lines, "health_interval", self.health_interval, float)
+        self.parallel_startup = str_to_bool(lines.get("parallel_startup", self.parallel_startup))
+        self.api_mode = lines.get("api_mode", self.api_mode)
+        if self.api_mode not in self.api_modes:
+            logging.info(f"Unknown api_mode '{self.api_mode}', using 'chat'.")
+            self.api_mode = "chat"
+        self.router_models = [m.strip() for m in lines.get("router_models", ",".join(self.router_models)).split(",") if m.strip()]
+        self.latency_budget = config_number(lines, "latency_budget", self.latency_budget, float)
+        self.profiles = self.load_profiles(lines)
+        self.active_profile = lines.get("profile", self.active_profile)
+        if self.active_profile != "default" and self.active_profile not in self.profiles:
+            logging.info(f"Unknown profile '{self.active_profile}', using 'default'.")
+            self.active_profile = "default"
+
+    def on_config_reloaded(self, keys):
+        """Applies edits made to oclip.cfg while the app is running."""
+        hotkeys = self.hotkeys()
+        scope = (self.model_name, self.sys_prompt + self.sys_postfix)
+        router_models = self.router_models
+        self.apply_config(self.config.values)
+        if scope[0] != self.model_name and self.model_ready.is_set():
+            # Keep serving the current model until the new one is loaded.
+            model, self.model_name = self.model_name, scope[0]
+            self.switch_model(model)
+        if self.router_models != router_models:
+            self.router = ModelRouter(self.router_models, self.latency_budget) if self.router_models else None
+        elif self.router is not None:
+            self.router.budget = self.latency_budget
+        if self.cache is not None and scope != (self.model_name, self.sys_prompt + self.sys_postfix):
+            self.cache.set_scope(self.model_name, self.sys_prompt + self.sys_postfix)
+        if self.hotkeys_registered and hotkeys != self.hotkeys():
+            keyboard.unhook_all_hotkeys()
+            self.setup_hotkey()
+        if "sys_prompt" in keys and self.update_flag is not None:
+            self.update_flag("sys_prompt", self.sys_prompt)
+        logging.info(f"Config reloaded ({', '.join(sorted(keys))}).")
+
+    def config_entries(self):
+        profile_entries = []
+        for profile in self.profiles.values():
+            profile_entries += profile.config_entries()
+        return [
+            ("Ollama model name. Please ensure that the model actually exists in the Ollama Repo.", "model", self.model_name),
+            ("Already downloaded model to use while the configured one is still being pulled (empty to use any "
+             "downloaded profile or router model).", "fallback_model", self.fallback_model),
+            ("Ollama server address, or auto to use OLLAMA_HOST (default http://127.0.0.1:11434).",
+             "ollama_host", self.ollama_host_setting),
+            ("Seconds to wait for the Ollama server to answer after starting it.", "ready_timeout", self.ready_timeout),
+            ("Comma separated Ollama servers to balance requests over (empty to only use ollama_host).",
+             "ollama_hosts", ",".join(self.ollama_hosts)),
+            ("Start a local Ollama server if none is running and stop it on exit (true/false).",
+             "manage_local_server", self.manage_local_server),
+            ("Seconds between Ollama server health checks.", "health_interval", self.health_interval),
+            ("Enable hotkeys and the tray while the model is still being pulled and loaded (true/false).",
+             "parallel_startup", self.parallel_startup),
+            ("System prompt to use for model output (write line breaks as \\n).", "sys_prompt", self.sys_prompt),
+            ("System prompt postfix.", "sys_postfix", self.sys_postfix),
+            ("Notification toggle hotkey.", "notif_hotkey", self.notif_hotkey),
+            ("Clipboard monitoring toggle hotkey.", "monitor_hotkey", self.monitor_hotkey),
+            ("Auto Paste toggle hotkey.", "auto_paste_hotkey", self.auto_paste_hotkey),
+            ("Hotkey that copies the selection and improves it with the active profile.",
+             "trigger_hotkey", self.trigger_hotkey),
+            ("Hotkey that cancels the in-flight request.", "cancel_hotkey", self.cancel_hotkey),
+            ("Hotkey that copies the original text of the selected (or latest) history entry.",
+             "restore_hotkey", self.restore_hotkey),
+            ("Hotkey that copies the improved text of the selected (or latest) history entry.",
+             "reapply_hotkey", self.reapply_hotkey),
+            ("Keep a searchable history of improvements (true/false).", "history", self.history_enabled),
+            ("Maximum number of history entries kept.", "history_max_entries", self.history_max_entries),
+            ("Relieve memory pressure by capping num_ctx, switching profile and unloading models (true/false, needs psutil).",
+             "memory_governor", self.governor_enabled),
+            ("Seconds between memory samples.", "memory_interval", self.governor_interval),
+            ("System memory use in percent above which the governor starts relieving pressure.",
+             "memory_high", self.memory_high),
+            ("System memory use in percent at which loaded models are unloaded right away.",
+             "memory_critical", self.memory_critical),
+            ("Ollama server memory in MB above which the governor relieves pressure (0 for no limit).",
+             "ollama_memory_max", self.ollama_memory_max),
+            ("Profile with a smaller model to switch to under memory pressure (empty to skip this step).",
+             "low_memory_profile", self.low_memory_profile),
+            ("Cap output tokens at this multiple of the input's estimated tokens (0 for no cap).",
+             "num_predict_ratio", self.num_predict_ratio),
+            ("Minimum output token cap, so very short inputs can still be rewritten.",
+             "num_predict_min", self.num_predict_min),
+            ("Smallest context window requested. The window is sized to the input in powers of two from here "
+             "(0 to use the model default).", "num_ctx_min", self.num_ctx_min),
+            ("Largest context window requested.", "num_ctx_max", self.num_ctx_max),
+            ("Sampling temperature (empty for the model default).", "temperature",
+             "" if self.temperature is None else self.temperature),
+            ("Comma separated stop sequences (empty for none).", "stop",
+             ",".join(escape_config_value(s) for s in self.stop)),
+            ("Only send changed paragraphs of lightly edited text to the model (true/false).",
+             "incremental", self.incremental),
+            ("Number of recent inputs remembered for incremental re-improvement.",
+             "incremental_memory", self.incremental_memory),
+            ("How alike (0 to 1) a text must be to a remembered one for incremental re-improvement.",
+             "incremental_min_similarity", self.incremental_min_similarity),
+            ("Start improving text as soon as it is copied so the trigger can use the cached result (true/false). "
+             "Needs a trigger_hotkey other than ctrl+c and uses the profile that was triggered last.",
+             "speculate", self.speculate),
+            ("Don't speculate on copied text longer than this many characters.",
+             "speculate_max_chars", self.speculate_max_chars),
+            ("Only speculate while system CPU usage is below this percentage (needs psutil).",
+             "speculate_max_cpu", self.speculate_max_cpu),
+            ("Stream model output as it is generated (true/false).", "stream", self.stream_output),
+            ("Type streamed output into the focused window as it arrives while Auto Paste is on (true/false).",
+             "stream_paste", self.stream_paste),
+            ("Cache improved text for repeated clipboard contents (true/false).", "cache", self.cache_enabled),
+            ("Maximum number of cached responses.", "cache_max_entries", self.cache_max_entries),
+            ("Maximum age of a cached response in seconds.", "cache_max_age", self.cache_max_age),
+            ("What a trigger does while another request is pending: queue, coalesce or cancel.",
+             "trigger_policy", self.trigger_policy),
+            ("Split clipboard text longer than this many characters into chunks (0 to disable).",
+             "chunk_threshold", self.chunk_threshold),
+            ("Maximum characters per chunk. Chunks are split on paragraph, then sentence boundaries.",
+             "chunk_size", self.chunk_size),
+            ("Maximum chunks processed concurrently, or auto to follow OLLAMA_NUM_PARALLEL (default 2). Also used as "
+             "OLLAMA_NUM_PARALLEL for a spawned server.", "chunk_parallel", self.chunk_parallel_setting),
+            ("Request engine: async (cancellable, with timeout) or sync.", "engine", self.engine),
+            ("Seconds before an async request is abandoned.", "request_timeout", self.request_timeout),
+            ("Ollama API to use: chat (keeps the system prompt as a stable, cacheable prefix) or generate.",
+             "api_mode", self.api_mode),
+            ("Record per-stage latencies to metrics.jsonl and log rolling percentiles (true/false).",
+             "metrics", self.metrics_enabled),
+            ("Number of recent requests the rolling percentiles are computed over.", "metrics_window", self.metrics_window),
+            ("How long Ollama keeps the model loaded after a request: seconds, a duration like 10m, or forever.",
+             "keep_alive", format_keep_alive(self.keep_alive)),
+            ("Seconds between background pings that keep the model loaded while idle (0 to disable).",
+             "keep_warm_interval", self.keep_warm_interval),
+            ("Models the default profile is routed between, smallest first, e.g. gemma3:1b,gemma3 (empty to disable).",
+             "router_models", ",".join(self.router_models)),
+            ("Target seconds per request the router picks the largest fitting model for.",
+             "latency_budget", self.latency_budget),
+            ("Profile used by the trigger hotkey. Add profiles with profile.<name>.model, .prompt, .hotkey, "
+             ".keep_alive and .warm lines.", "profile", self.active_profile),
+        ] + profile_entries
+
+    def load_profiles(self, lines):
+        fields = {}
+        for key, val in lines.items():
+            if key.startswith("profile.") and key.count(".") >= 2:
+                _, name, field = key.split(".", 2)
+                fields.setdefault(name, {})[field] = val
+        profiles = {}
+        for name, values in fields.items():
+            if name == "default":
+                logging.info("The 'default' profile is defined by model and sys_prompt, ignoring profile.default.")
+                continue
+            profiles[name] = Profile(
+                name,
+                values.get("model", self.model_name),
+                values.get("prompt", self.sys_prompt),
+                values.get("hotkey"),
+                parse_keep_alive(values.get("keep_alive", self.keep_alive)),
+                str_to_bool(values.get("warm", True)),
+                # Empty means the global num_predict_ratio; expanding prompts such as translations may need more.
+                config_number(lines, f"profile.{name}.num_predict_ratio", None, float)
+                if str(values.get("num_predict_ratio", "")).strip() else None
+            )
+        return profiles
 
-            f.write("# System prompt postfix.\n")
-            if self.sys_postfix != spfx:
-                f.write(f"sys_postfix={self.sys_postfix}\n")
-            else:
-                f.write(f"sys_postfix={spfx}\n")
+    def default_profile(self):
+        model = self.serving_fallback or self.model_name
+        return Profile("default", model, self.sys_prompt, self.trigger_hotkey, self.keep_alive)
 
-            f.write("# Notification toggle hotkey\n")
-            if self.notif_hotkey != n:
-                f.write(f"notif_hotkey={self.notif_hotkey}\n")
-            else:
-                f.write(f"notif_hotkey={n}\n")
+    def all_profiles(self):
+        return [self.default_profile()] + list(self.profiles.values())
 
-            f.write("# Clipboard monitoring toggle hotkey.\n")
-            if self.monitor_hotkey != m:
-                f.write(f"monitor_hotkey={self.monitor_hotkey}\n")
-            else:
-                f.write(f"monitor_hotkey={m}\n")
+    def profile_for(self, job=None):
+        if job is not None and job.profile is not None:
+            return job.profile
+        return self.profiles.get(self.profile_override or self.active_profile) or self.default_profile()
 
-            f.write("# Auto Paste toggle hotkey.\n")
-            if self.auto_paste_hotkey != a:
-                f.write(f"auto_paste_hotkey={self.auto_paste_hotkey}\n")
-            else:
-                f.write(f"auto_paste_hotkey={a}\n")
+    def set_active_profile(self, name):
+        self.active_profile = name
+        logging.info(f"Active profile set to '{name}'.")
+        if self.tray_icon is not None:
+            self.tray_icon.update_menu()
+        self.update_config()
 
-        logging.info("Config updated!")
+    def update_config(self):
+        changed = False
+        for comment, key, val in self.config_entries():
+            changed |= self.config.set(key, format_config_value(val), comment)
+        if changed:
+            logging.info("Config updated!")
 
     def stop_threads(self):
         self.stop_event.set()
-        if self.thread.is_alive():
+        self.model_ready.set()
+        self.cancel_request()
+        self.jobs.put(None)
+        if self.thread is not None and self.thread.is_alive():
             self.thread.join()
         self.exit_app()
 
+    def load_sound_player(self):
+        # Headless runs (benchmarks) have no Qt application to play through and fall back to playsound.
+        if QApplication.instance() is None:
+            return None
+        try:
+            return SoundPlayer(self.notif_audio)
+        except Exception as e:
+            logging.info(f"Couldn't preload notification sound, falling back to playsound:\n{e}")
+            return None
+
     def notify_sound(self):
         if self.notifications_enabled:
-            ps.playsound(self.notif_audio)
+            self.notifier.sound()
     
     def exit_app(self, code=0, kill_o=True):
+        # os._exit skips the debounce timer, so pending config writes go out now.
+        self.config.flush()
         if kill_o:
             self.killOllama()
+        if self.async_engine is not None:
+            self.async_engine.stop()
         try:
             if self.tray_icon is not None:
                 self.tray_icon.stop()
@@ -638,10 +1232,18 @@ class ImproveClipboard:
         os._exit(code)
 
     def killOllama(self):
+        # Only the server OCliP started itself is stopped; servers shared with other tools are left running.
+        if self.ollama_process is None or self.ollama_process.poll() is not None:
+            return
         if self.sys_os == "Windows":
-            subprocess.run(['taskkill', '/F', '/IM', 'ollama.exe'], creationflags=subprocess.CREATE_NO_WINDOW)
+            subprocess.run(['taskkill', '/F', '/T', '/PID', str(self.ollama_process.pid)],
+                           creationflags=subprocess.CREATE_NO_WINDOW)
         else:
-            subprocess.run(['pkill', '-f', 'ollama'])
+            self.ollama_process.terminate()
+            try:
+                self.ollama_process.wait(5)
+            except subprocess.TimeoutExpired:
+                self.ollama_process.kill()
 
     @staticmethod
     def setLogger():
@@ -650,8 +1252,11 @@ class ImproveClipboard:
             format='[%(asctime)s] %(message)s',
             datefmt='%H:%M:%S',
             handlers = [
-                logging.FileHandler("latest.log", mode="a", encoding="utf-8"),
-                logging.StreamHandler()
+                logging.handlers.RotatingFileHandler("latest.log", mode="a", encoding="utf-8",
+                                                     maxBytes=ImproveClipboard.log_max_bytes,
+                                                     backupCount=ImproveClipboard.log_backups),
+                # In the window, stderr is its LogSink, which takes records directly.
+                sys.stderr if isinstance(sys.stderr, LogSink) else logging.StreamHandler()
             ],
         )
         logging.getLogger("httpx").setLevel(logging.WARNING)
@@ -665,7 +1270,7 @@ class ImproveClipboard:
         logging.info(f"Clipboard monitoring {state}.")
         self.tray_icon.update_menu()
         if self.notifications_enabled:
-            self.notify("OCliP", f"Clipboard monitoring {state}.")
+            self.notify("OCliP", f"Clipboard monitoring {state}.", "monitor")
 
     def toggle_auto_paste(self):
         self.auto_paste = not self.auto_paste
@@ -673,12 +1278,29 @@ class ImproveClipboard:
         logging.info(f"Auto Paste {state}.")
         self.tray_icon.update_menu()
         if self.notifications_enabled:
-            self.notify("OCliP", f"Auto Paste {state}.")
+            self.notify("OCliP", f"Auto Paste {state}.", "auto")
 
-    def toggle_trigger(self):
-        if not self.triggered and self.monitoring_enabled:
-            self.triggered = True
-            logging.info(f"Clipboard updated triggered.")
+    def toggle_trigger(self, profile=None):
+        # The monitor's own ctrl+c also matches the trigger hotkey.
+        if not self.monitoring_enabled or self.capturing.is_set():
+            return
+        with self.job_lock:
+            if self.trigger_policy != "queue" and not self.jobs.empty():
+                logging.info("Trigger coalesced with pending request.")
+                return
+            if self.trigger_policy == "cancel":
+                self.cancel_request()
+            job = TriggerJob()
+            job.profile = profile or self.profile_for()
+            self.last_trigger_profile = job.profile.name
+            self.jobs.put(job)
+        logging.info(f"Clipboard updated triggered ({job.profile.name}).")
+
+    def cancel_request(self):
+        job = self.current_job
+        if job is not None and not job.cancelled.is_set():
+            job.cancel()
+            logging.info("Cancelling in-flight request.")
 
     def toggle_notifications(self):
         self.notifications_enabled = not self.notifications_enabled
@@ -686,9 +1308,14 @@ class ImproveClipboard:
         logging.info(f"Notifications {state}.")
         self.tray_icon.update_menu()
         if self.notifications_enabled:
-            self.notify("OCliP", "Notifications Enabled")
+            self.notify("OCliP", "Notifications Enabled", "notifications")
     
+    def hotkeys(self):
+        return (self.monitor_hotkey, self.auto_paste_hotkey, self.trigger_hotkey, self.notif_hotkey, self.cancel_hotkey,
+                self.restore_hotkey, self.reapply_hotkey, tuple((p.name, p.hotkey) for p in self.profiles.values()))
+
     def setup_hotkey(self):
+        self.hotkeys_registered = True
         keyboard.add_hotkey(
             self.monitor_hotkey,
             lambda: self.update_flag("monitor", not self.monitoring_enabled)
@@ -705,6 +1332,26 @@ class ImproveClipboard:
             self.notif_hotkey,
             lambda: self.update_flag("notifications", not self.notifications_enabled)
         )
+        keyboard.add_hotkey(
+            self.cancel_hotkey,
+            self.cancel_request
+        )
+        if self.history is not None:
+            keyboard.add_hotkey(
+                self.restore_hotkey,
+                self.restore_original
+            )
+            keyboard.add_hotkey(
+                self.reapply_hotkey,
+                self.reapply_improvement
+            )
+        for profile in self.profiles.values():
+            if profile.hotkey:
+                # Looked up by name on every press, so edits to the profile apply without re-registering.
+                keyboard.add_hotkey(
+                    profile.hotkey,
+                    lambda name=profile.name: self.toggle_trigger(self.profiles.get(name))
+                )
 
     def initOllama(self):
         try:
@@ -712,73 +1359,317 @@ class ImproveClipboard:
                 kwargs = {}
                 if self.sys_os == "Windows":
                     kwargs["creationflags"] = subprocess.CREATE_NO_WINDOW
-                subprocess.Popen(['ollama', 'serve'],
+                env = os.environ.copy()
+                env.setdefault("OLLAMA_NUM_PARALLEL", str(self.chunk_parallel))
+                env["OLLAMA_HOST"] = self.ollama_host.split("://", 1)[1]
+                self.ollama_process = subprocess.Popen(['ollama', 'serve'],
                                  stdout=subprocess.DEVNULL,
                                  stderr=subprocess.DEVNULL,
+                                 env=env,
                                  **kwargs
                 )
-
-            self.client = ollama.Client()
-
-            t = threading.Thread(
-                target=self.pull_model, 
-                daemon=True,
-                name="PullModel"
-            )
-            t.start()
-            prefix = "Pulling Ollama model"
-            while(t.is_alive()):
-                p = f"."
-                logging.info(prefix + p )
-                if len(p)==3:
-                    p = f"."
-                else:
-                    p += "."
-                time.sleep(1)
-            
-            logging.info("Done pulling model! Loading Model...")
-            _ = self.client.generate(model=self.model_name, prompt="Hello", )
+                start = time.perf_counter()
+                if not self.wait_for_ollama(self.ready_timeout):
+                    raise Exception(f"Ollama server at {self.ollama_host} didn't become ready in {self.ready_timeout:.0f} s.")
+                logging.info(f"Ollama server ready after {time.perf_counter() - start:.2f} s.")
+            self.connect()
+            if self.ollama_started and not self.pool.wait_ready(self.ready_timeout):
+                raise Exception(f"No Ollama server answered in {self.ready_timeout:.0f} s.")
+            startup.mark("ollama ready")
+
+            self.models = ModelManager()
+            missing = self.missing_models()
+            fallback = self.find_fallback(missing) if missing else None
+            if fallback is not None:
+                self.serving_fallback = fallback
+                logging.info(f"Using {fallback} while {self.model_name} downloads in the background.")
+                threading.Thread(
+                    target=self.pull_model,
+                    args=(missing,),
+                    daemon=True,
+                    name="PullModel"
+                ).start()
+            elif missing:
+                self.pull_model(missing, warm=False)
+
+            logging.info("Loading Model...")
+            self.warm_all()
             logging.info("Done loading model!")
+            self.refresh_models()
 
         except Exception as e:
             raise e
     
-    def pull_model(self):
-        self.client.pull(self.model_name)
+    def warm_model(self, profile=None, prime=False, client=None):
+        """
+        Loads the profile's model without generating anything, using its keep_alive. With prime set in chat mode,
+        the system prompt is also evaluated once (for a single output token) so the first request hits the cache.
+        """
+        profile = profile or self.default_profile()
+        client = client or self.client
+        # Warming with the smallest context window loads the model the way most requests will ask for it.
+        args = self.request_args("", profile)
+        args.pop("api")
+        if prime and self.api_mode == "chat":
+            args["options"]["num_predict"] = 1
+            response = client.chat(**args)
+        else:
+            response = client.generate(model=profile.model, prompt="", options=args["options"],
+                                       keep_alive=profile.request_keep_alive())
+        load = (getattr(response, "load_duration", None) or 0) / 1e9
+        if self.metrics is not None:
+            self.metrics.record_load(load)
+        return load
+
+    def start_keep_warm(self):
+        def keep_warm():
+            while not self.stop_event.wait(self.keep_warm_interval):
+                if self.current_job is not None or not self.jobs.empty():
+                    continue
+                if self.governor is not None and self.governor.level > 0:
+                    continue
+                for backend in self.pool.backends:
+                    if not backend.healthy:
+                        continue
+                    for profile in self.warm_profiles():
+                        try:
+                            load = self.warm_model(profile, client=backend.client)
+                            if load >= LatencyMetrics.cold_load_threshold:
+                                logging.info(f"Keep-warm ping reloaded {profile.model} on {backend.host} in {load:.2f} s.")
+                        except Exception as e:
+                            logging.warning(f"Keep-warm ping for {profile.model} on {backend.host} failed:\n{e}")
+
+        if self.keep_warm_interval > 0:
+            threading.Thread(target=keep_warm, daemon=True, name="KeepWarm").start()
+
+    def hosts(self):
+        return self.ollama_hosts or [self.ollama_host]
+
+    def connect(self, hosts=None):
+        if self.engine == "async":
+            self.async_engine = AsyncEngine(timeout=self.request_timeout)
+        self.pool = OllamaPool(hosts or self.hosts(), self.async_engine is not None, self.request_timeout)
+        self.pool.start_health_checks(self.health_interval, self.stop_event)
+        # Model management (pull, list, warmup) goes to the first server.
+        self.client = self.pool.backends[0].client
+
+    def warm_profiles(self):
+        """One warm profile per model, so shared models are only pinged once."""
+        profiles = {}
+        for profile in self.all_profiles():
+            if profile.warm:
+                profiles.setdefault(profile.model, profile)
+        return list(profiles.values())
+
+    def local_models(self):
+        """
+        Models downloaded on any healthy server, for the model selectors. Menus are built on the GUI and tray
+        threads, so this returns the last known list and refreshes it in the background once it is stale.
+        """
+        if time.monotonic() - self.model_list_time > self.model_list_ttl:
+            self.refresh_models(wait=False)
+        return self.model_list or [self.model_name]
+
+    def refresh_models(self, wait=True):
+        if self.pool is None or self.models is None:
+            return
+        with self.job_lock:
+            if self.model_list_refreshing:
+                return
+            self.model_list_refreshing = True
+
+        def refresh():
+            try:
+                models = set()
+                for backend in self.pool.backends:
+                    if backend.healthy:
+                        models |= {m.removesuffix(":latest") for m in self.models.installed(backend)}
+                self.model_list = sorted(models)
+                self.model_list_time = time.monotonic()
+            finally:
+                self.model_list_refreshing = False
+            if self.tray_icon is not None:
+                self.tray_icon.update_menu()
 
-    def is_ollama_running(self):
-        for proc in psutil.process_iter(['cmdline']):
+        if wait:
+            refresh()
+        else:
+            threading.Thread(target=refresh, daemon=True, name="ModelList").start()
+
+    def switch_model(self, model):
+        """
+        Loads `model` in the background while the current model keeps serving, then makes it the default model
+        and unloads the previous one.
+        """
+        model = model.strip()
+        if not model or model == self.model_name:
+            return
+        if not self.model_ready.is_set():
+            logging.info("Models can be switched once loading has finished.")
+            return
+        with self.job_lock:
+            running = self.switch_target is not None
+            self.switch_target = model
+        if running:
+            logging.info(f"Will switch to {model} after the current switch.")
+            return
+        threading.Thread(target=self.run_model_switch, daemon=True, name="ModelSwitch").start()
+
+    def run_model_switch(self):
+        while True:
+            with self.job_lock:
+                model = self.switch_target
+                if model is None or model == self.model_name:
+                    self.switch_target = None
+                    break
+            start = time.perf_counter()
+            loaded = self.preload_model(model)
+            with self.job_lock:
+                if self.switch_target != model:
+                    # A newer choice came in while this one loaded.
+                    continue
+                self.switch_target = None
+                if not loaded:
+                    break
+                old, self.model_name = self.model_name, model
+                self.serving_fallback = None
+            if self.cache is not None:
+                self.cache.set_scope(self.model_name, self.sys_prompt + self.sys_postfix)
+            self.update_config()
+            logging.info(f"Switched from {old} to {model} in {time.perf_counter() - start:.2f} s.")
+            self.unload_model(old)
+            self.refresh_models()
+            break
+        if self.tray_icon is not None:
+            self.tray_icon.update_menu()
+        if self.update_flag is not None:
+            self.update_flag("model", self.model_name)
+
+    def preload_model(self, model):
+        logging.info(f"Loading {model} in the background...")
+        profile = Profile("default", model, self.sys_prompt, self.trigger_hotkey, self.keep_alive)
+        try:
+            for backend in self.pool.backends:
+                if not backend.healthy:
+                    continue
+                if self.models.missing(backend, [model]):
+                    self.models.pull(backend, model)
+                self.warm_model(profile, prime=True, client=backend.client)
+            return True
+        except Exception as e:
+            logging.error(f"Couldn't load {model}, keeping {self.model_name}:\n{e}")
+            return False
+
+    def unload_model(self, model):
+        """Frees the memory of a model no profile or router uses anymore."""
+        if model in self.required_models():
+            return
+        for backend in self.pool.backends:
+            if not backend.healthy:
+                continue
             try:
-                cmdline = proc.info['cmdline']
-                if cmdline and 'ollama' in cmdline and 'serve' in cmdline:
-                    return True
-            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                backend.client.generate(model=model, prompt="", keep_alive=0)
+            except Exception as e:
+                logging.warning(f"Couldn't unload {model} on {backend.host}:\n{e}")
+        logging.info(f"Unloaded {model}.")
+
+    def required_models(self):
+        models = [self.model_name] + [profile.model for profile in self.profiles.values()] + self.router_models
+        return list(dict.fromkeys(models))
+
+    def missing_models(self):
+        """Maps each healthy backend to the required models it doesn't have yet."""
+        missing = {}
+        for backend in self.pool.backends:
+            if backend.healthy:
+                models = self.models.missing(backend, self.required_models())
+                if models:
+                    missing[backend] = models
+        return missing
+
+    def find_fallback(self, missing):
+        """An already downloaded model to serve while the configured model is pulled, if one is needed."""
+        if not any(self.model_name in models for models in missing.values()):
+            return None
+        backend = self.pool.backends[0]
+        candidates = [self.fallback_model] if self.fallback_model else self.required_models()
+        for model in candidates:
+            if model != self.model_name and not self.models.missing(backend, [model]):
+                return model
+        return None
+
+    def warm_all(self):
+        for backend in self.pool.backends:
+            if not backend.healthy:
                 continue
+            for profile in self.warm_profiles():
+                try:
+                    self.warm_model(profile, prime=True, client=backend.client)
+                except Exception as e:
+                    # Models still being pulled in the background are warmed once they arrive.
+                    logging.warning(f"Couldn't load {profile.model} on {backend.host}:\n{e}")
+
+    def pull_model(self, missing, warm=True):
+        for backend, models in missing.items():
+            for model in models:
+                try:
+                    self.models.pull(backend, model)
+                except Exception as e:
+                    logging.error(f"Couldn't pull {model} on {backend.host}:\n{e}")
+        if self.serving_fallback is not None and not self.missing_models():
+            fallback, self.serving_fallback = self.serving_fallback, None
+            logging.info(f"Switched from {fallback} to {self.model_name}.")
+        self.refresh_models()
+        if warm:
+            self.warm_all()
+
+    def is_ollama_running(self, timeout=0.5, retries=2):
+        """Probes the Ollama API, retrying with a doubling delay before giving up."""
+        delay = 0.1
+        for attempt in range(retries + 1):
+            if probe_ollama(self.ollama_host, timeout):
+                return True
+            if attempt < retries:
+                time.sleep(delay)
+                delay *= 2
+        return False
+
+    def wait_for_ollama(self, timeout=30.0):
+        deadline = time.perf_counter() + timeout
+        delay = 0.05
+        while time.perf_counter() < deadline:
+            if self.is_ollama_running(retries=0):
+                return True
+            time.sleep(min(delay, max(deadline - time.perf_counter(), 0)))
+            delay = min(delay * 2, 1.0)
         return False
 
     def start_clipboard_monitor(self):
         def monitor():
             logging.info("Clipboard monitoring started.")
             while not self.stop_event.is_set():
-                if self.monitoring_enabled and self.triggered:
-                    try:
-                        keyboard.press_and_release('ctrl+c')
-                        time.sleep(0.1)
-                        current_text = pyperclip.paste()
-                        logging.info("Clipboard changed. Improving text...")
-                        improved = self.improve_text(current_text)
-                        pyperclip.copy(improved)
-                        if self.auto_paste:
-                            keyboard.send('ctrl+v')
-                        logging.info("Clipboard updated with improved text.")
-                        # self.notify("Clipboard Improved", "Text has been processed and updated.")
-                        threading.Thread(target=self.notify_sound, daemon=True, name="NotifSound").start()
-                    except KeyboardInterrupt:
+                job = self.jobs.get()
+                if job is None:
+                    break
+                if not self.monitoring_enabled or job.cancelled.is_set():
+                    continue
+                if not self.model_ready.is_set():
+                    logging.info("Waiting for the model to finish loading...")
+                    self.model_ready.wait()
+                    if self.stop_event.is_set():
                         break
-                    except Exception as e:
-                        logging.error(f"Error while monitoring clipboard:\n{e}")
-                self.triggered = False
-                time.sleep(0.1)
+                self.current_job = job
+                try:
+                    self.process_job(job)
+                except KeyboardInterrupt:
+                    break
+                except RequestCancelledException as e:
+                    logging.info(f"Request cancelled. Clipboard left unchanged. {e}".strip())
+                except Exception as e:
+                    logging.error(f"Error while monitoring clipboard:\n{e}")
+                finally:
+                    self.current_job = None
+                    job.done.set()
 
         return threading.Thread(
             target=monitor, 
@@ -786,7 +1677,145 @@ class ImproveClipboard:
             name="KeyboardMonitor"
         )
 
+    def process_job(self, job):
+        job.mark("queued", job.created)
+        if job.text is not None:
+            return self.process_headless_job(job)
+        start = time.perf_counter()
+        self.capturing.set()
+        try:
+            keyboard.press_and_release('ctrl+c')
+            time.sleep(0.1)
+        finally:
+            self.capturing.clear()
+        job.mark("capture", start)
+
+        start = time.perf_counter()
+        current_text = pyperclip.paste()
+        job.mark("paste", start)
+        if self.speculator is not None:
+            start = time.perf_counter()
+            self.speculator.claim(current_text, self.request_timeout)
+            job.mark("speculation_wait", start)
+
+        logging.info("Clipboard changed. Improving text...")
+        typer = StreamTyper() if self.auto_paste and self.stream_output and self.stream_paste else None
+        start = time.perf_counter()
+        improved = None
+        try:
+            improved = self.improve_text(current_text, on_token=typer, job=job)
+        finally:
+            if typer is not None:
+                typer.finish()
+                # A failed or cancelled stream would leave a partial answer in place of the selection; take it back.
+                # Failures are pasted below, a cancel restores the original that is still on the clipboard.
+                if typer.typed and (improved is None or improved.strip() != typer.typed):
+                    typer.undo()
+                    if improved is None:
+                        keyboard.send('ctrl+v')
+        job.mark("improve", start)
+
+        start = time.perf_counter()
+        self.last_copied = improved
+        pyperclip.copy(improved)
+        job.mark("copy", start)
+        if self.auto_paste and (typer is None or not typer.typed):
+            start = time.perf_counter()
+            keyboard.send('ctrl+v')
+            job.mark("auto_paste", start)
+        job.mark("total", job.created)
+        logging.info("Clipboard updated with improved text.")
+        # Failed runs hand back the input unchanged and aren't worth keeping.
+        if self.history is not None and improved.strip() != current_text.strip():
+            profile = self.profile_for(job)
+            self.history.add(current_text, improved, profile.model, profile.prompt, job.stages.get("total"),
+                             job.stats)
+        if self.metrics is not None:
+            self.metrics.record(job, self.profile_for(job).model, len(current_text))
+            logging.info(self.metrics.summary())
+        # self.notify("Clipboard Improved", "Text has been processed and updated.")
+        self.notify_sound()
+
+    def history_entry(self):
+        """The entry picked in the history window or tray, or the latest one."""
+        if self.history is None:
+            return None
+        entry = self.history.get(self.history_selection) if self.history_selection is not None else None
+        return entry or self.history.latest()
+
+    def select_history(self, entry_id):
+        self.history_selection = entry_id
+
+    def restore_original(self, entry=None):
+        self.apply_history(entry or self.history_entry(), "original")
+
+    def reapply_improvement(self, entry=None):
+        self.apply_history(entry or self.history_entry(), "improved")
+
+    def apply_history(self, entry, field, paste=True):
+        if entry is None:
+            logging.info("History is empty.")
+            return
+        self.last_copied = entry[field]
+        pyperclip.copy(entry[field])
+        if paste and self.auto_paste:
+            keyboard.send('ctrl+v')
+        logging.info(f"Copied {field} text of history entry {entry['id']} to the clipboard.")
+
+    def history_menu(self):
+        pystray = lazy_import("pystray")
+        Menu, MenuItem = pystray.Menu, pystray.MenuItem
+        for entry in self.history.recent(10):
+            label = " ".join(entry["original"].split())
+            yield MenuItem(label[:40] + ("..." if len(label) > 40 else ""), Menu(
+                MenuItem('Re-apply Improvement', lambda x, e=entry: self.reapply_improvement(e)),
+                MenuItem('Restore Original', lambda x, e=entry: self.restore_original(e)),
+            ))
+
+    def on_clipboard_changed(self, text):
+        """Called with the new clipboard text whenever it changes; hands it to the speculator."""
+        if self.speculator is None or not self.monitoring_enabled or not text.strip():
+            return
+        if text == self.last_copied or len(text) > self.speculate_max_chars:
+            return
+        self.speculator.offer(text)
+
+    def speculation_profile(self):
+        """
+        The profile a trigger for freshly copied text will most likely use. Which hotkey fires isn't known yet, so
+        this is the profile of the last trigger, falling back to the active one.
+        """
+        name = self.last_trigger_profile
+        if name == "default":
+            return self.default_profile()
+        return self.profiles.get(name) or self.profile_for()
+
+    def is_idle(self):
+        """Whether a speculative request can run without competing with a real one or a busy machine."""
+        if not self.model_ready.is_set() or self.current_job is not None or not self.jobs.empty():
+            return False
+        if self.pool is not None and any(b.outstanding for b in self.pool.backends):
+            return False
+        if self.governor is not None and self.governor.level > 0:
+            return False
+        try:
+            cpu = lazy_import("psutil").cpu_percent(interval=0.1)
+        except ImportError:
+            return True
+        return cpu < self.speculate_max_cpu
+
+    def process_headless_job(self, job):
+        """Runs a job that carries its own text, without touching the keyboard or the system clipboard."""
+        start = time.perf_counter()
+        job.result = self.improve_text(job.text, job=job)
+        job.mark("improve", start)
+        job.mark("total", job.created)
+        if self.metrics is not None:
+            self.metrics.record(job, self.profile_for(job).model, len(job.text))
+
     def make_tray_icon(self):
+        pystray = lazy_import("pystray")
+        Menu, MenuItem = pystray.Menu, pystray.MenuItem
         menu = Menu(
             MenuItem('Toggle Auto Paste',
                      lambda x: self.update_flag("auto", not self.auto_paste),
@@ -798,52 +1827,1918 @@ class ImproveClipboard:
             MenuItem('Toggle Notifications',
                      lambda x: self.update_flag("notifications", not self.notifications_enabled),
                      checked=lambda item: self.notifications_enabled),
+            MenuItem('Profile', Menu(lambda: (
+                MenuItem(
+                    profile.name,
+                    lambda x, name=profile.name: self.set_active_profile(name),
+                    checked=lambda item, name=profile.name: self.active_profile == name,
+                    radio=True)
+                for profile in self.all_profiles()
+            ))),
+            MenuItem('Model', Menu(lambda: (
+                MenuItem(
+                    model,
+                    lambda x, m=model: self.switch_model(m),
+                    checked=lambda item, m=model: self.model_name == m,
+                    radio=True)
+                for model in self.local_models()
+            ))),
+            MenuItem('History', Menu(self.history_menu), visible=self.history is not None),
+            MenuItem('Cancel Request', lambda x: self.cancel_request()),
             MenuItem('Quit', self.stop_threads)
         )
-        icon_image = Image.open(self.app_icon)
-        return Icon("OCliP", icon=icon_image, menu=menu)
-
-    def improve_text(self, clipboard_text):
+        icon_image = lazy_import("PIL.Image").open(self.app_icon)
+        return pystray.Icon("OCliP", icon=icon_image, menu=menu)
+
+    def cached_improvement(self, key, on_token=None, job=None):
+        cached = self.cache.get(key)
+        if cached is not None:
+            logging.info("Using cached improvement.")
+            if job is not None:
+                job.stats["cached"] = True
+            if on_token is not None:
+                on_token(cached)
+        return cached
+
+    def improve_text(self, clipboard_text, on_token=None, job=None):
+        profile = self.profile_for(job)
+        key = None
+        if self.cache is not None:
+            key = self.cache.make_key(profile.model, profile.prompt+self.sys_postfix, clipboard_text)
+            cached = self.cached_improvement(key, on_token, job)
+            if cached is not None:
+                return cached
+        if self.router is not None and profile.name == "default":
+            # Routing happens after the cache lookup so hits don't pay for querying loaded models.
+            routed = self.route(profile, clipboard_text)
+            if job is not None:
+                job.profile = routed
+            if key is not None and routed.model != profile.model:
+                # Results are cached under the model that produced them.
+                key = self.cache.make_key(routed.model, routed.prompt+self.sys_postfix, clipboard_text)
+                cached = self.cached_improvement(key, on_token, job)
+                if cached is not None:
+                    return cached
+            profile = routed
+        scope = (profile.model, profile.prompt + self.sys_postfix)
+        plan = None
+        if self.incremental:
+            plan = self.segments.plan(scope, clipboard_text, self.incremental_min_similarity)
+        complete = True
         try:
-            response = self.client.generate(
-                model=self.model_name,
-                prompt=clipboard_text,
-                system=self.sys_prompt+self.sys_postfix,
-                keep_alive=10.0
-            )
-            return response['response'].strip()
+            if plan is not None:
+                improved, complete = self.improve_incremental(plan, on_token, job, profile)
+            elif 0 < self.chunk_threshold < len(clipboard_text) or self.exceeds_context_cap(clipboard_text, profile):
+                improved, complete = self.improve_chunked(clipboard_text, on_token, job, profile)
+            elif self.stream_output:
+                improved = self.stream_text(clipboard_text, on_token, job, profile)
+            else:
+                improved = self.generate_text(clipboard_text, job, profile)
+            if job is not None and job.cancelled.is_set():
+                raise RequestCancelledException()
+        except RequestCancelledException:
+            raise
+        except OutputTruncatedException as e:
+            logging.error(f"{e} Raise num_predict_ratio (or the profile's) if this happens on normal text.")
+            if job is None or not job.speculative:
+                self.notify("OCliP", f"{e} Text left unchanged.", "truncated")
+            return clipboard_text
         except Exception as e:
             logging.error(f"Text improvement failed:\n{e}")
             return clipboard_text
-    
-    def notify(self, title, message):
-        if self.notifications_enabled:
+        if not complete:
+            # Pieces that kept their original text are retried the next time instead of being served from the cache
+            # or reused as a paragraph's improvement.
+            logging.info("Parts of the text kept their original wording, not caching the result.")
+            return improved
+        if key is not None and improved:
+            self.cache.put(key, improved)
+        if self.incremental and improved:
+            self.segments.remember(scope, clipboard_text, improved)
+        return improved
+
+    def route(self, profile, clipboard_text):
+        tokens = estimate_tokens(clipboard_text)
+        if 0 < self.chunk_threshold < len(clipboard_text):
+            chunks = len(split_text(clipboard_text, self.chunk_size))
+            tokens = -(-tokens // min(chunks, self.chunk_parallel))
+        # The monitor thread must not wait on a slow server here, so this is the health check's view of the server
+        # the request will most likely go to.
+        model, reason = self.router.choose(tokens, self.pool.peek().loaded_models())
+        logging.info(f"Router: ~{tokens} tokens -> {model} ({reason}).")
+        return Profile(profile.name, model, profile.prompt, profile.hotkey, profile.keep_alive, profile.warm,
+                       profile.num_predict_ratio)
+
+    def request_options(self, clipboard_text, system, profile=None):
+        ratio = self.num_predict_ratio
+        if profile is not None and profile.num_predict_ratio is not None:
+            ratio = profile.num_predict_ratio
+        return generation_options(clipboard_text, system, ratio, self.num_predict_min, self.num_ctx_min,
+                                  self.num_ctx_max, self.num_ctx_limit, self.temperature, self.stop)
+
+    def exceeds_context_cap(self, clipboard_text, profile):
+        """Whether the text needs more context than the memory governor's num_ctx cap, so it is better chunked."""
+        if self.num_ctx_limit is None:
+            return False
+        options = self.request_options(clipboard_text, profile.prompt + self.sys_postfix, profile)
+        return options.get("num_ctx", 0) > self.num_ctx_limit
+
+    def request_keep_alive(self, profile):
+        # Once the governor has unloaded the models, requests let Ollama drop them again right after answering.
+        if self.governor is not None and self.governor.level >= 3:
+            return 0
+        return profile.request_keep_alive()
+
+    def request_args(self, clipboard_text, profile):
+        # The system prompt must stay byte-identical between requests for Ollama to reuse its cached prefix.
+        system = profile.prompt+self.sys_postfix
+        options = self.request_options(clipboard_text, system, profile)
+        if self.api_mode == "chat":
+            return dict(
+                api="chat",
+                model=profile.model,
+                messages=[
+                    {"role": "system", "content": system},
+                    {"role": "user", "content": clipboard_text},
+                ],
+                options=options,
+                keep_alive=self.request_keep_alive(profile)
+            )
+        return dict(
+            api="generate",
+            model=profile.model,
+            prompt=clipboard_text,
+            system=system,
+            options=options,
+            keep_alive=self.request_keep_alive(profile)
+        )
+
+    def request(self, job=None, on_piece=None, api="generate", **kwargs):
+        """
+        Runs a generate() or chat() call on the configured engine. Returns the generated text and the final response.
+        """
+        if self.router is not None:
+            self.router.begin(kwargs.get("model"))
+        try:
+            text, response = self.run_pooled(job, on_piece, api, **kwargs)
+        finally:
+            if self.router is not None:
+                self.router.end(kwargs.get("model"))
+        if job is not None:
+            job.add_response(response)
+        if self.router is not None:
+            self.router.observe(kwargs.get("model"), response)
+        self.report_prompt_cache(job, api, kwargs, response)
+        if getattr(response, "done_reason", None) == "length":
+            # A cut-off rewrite must never replace the user's text; callers decide what to keep and tell the user.
+            num_predict = kwargs.get("options", {}).get("num_predict")
+            raise OutputTruncatedException(f"Output was cut off at {num_predict} tokens.")
+        return text, response
+
+    def run_pooled(self, job=None, on_piece=None, api="generate", **kwargs):
+        """Sends the request to the least busy healthy server, failing over to the next one on timeouts."""
+        tried = set()
+        emitted = False
+
+        def on_emit(piece):
+            nonlocal emitted
+            emitted = True
+            if on_piece is not None:
+                on_piece(piece)
+
+        while True:
+            backend = self.pool.acquire(tried)
+            tried.add(backend.host)
             try:
-                notification.notify(
-                    title=title,
-                    message=message,
-                    timeout=0.5,
-                    app_name=self.app_name,
-                    app_icon=self.app_icon,
-                    ticker='ticker',
-                    toast=True
-                )
+                result = self.run_request(backend, job, on_emit, api, **kwargs)
+                if kwargs.get("keep_alive") != 0:
+                    # The model stays loaded there; the router shouldn't treat it as cold until the next health check.
+                    backend.loaded.add(ModelManager.normalize(kwargs.get("model", "")))
+                return result
+            except (RequestTimeoutException, ConnectionError, lazy_import("httpx").TransportError) as e:
+                self.pool.mark_unhealthy(backend, e)
+                # Output that was already typed can't be taken back, so only fail over before the first token.
+                if emitted or len(tried) >= len(self.pool.backends):
+                    raise
+                logging.info(f"Retrying on another Ollama server after {backend.host} failed.")
+            finally:
+                self.pool.release(backend)
+
+    def run_request(self, backend, job=None, on_piece=None, api="generate", **kwargs):
+        if self.async_engine is not None:
+            return self.async_engine.generate(job, on_piece, api, backend.async_client, **kwargs)
+        parts = []
+        client = backend.request_client
+        try:
+            if kwargs.get("stream"):
+                response = None
+                for response in getattr(client, api)(**kwargs):
+                    if job is not None and job.cancelled.is_set():
+                        raise RequestCancelledException()
+                    piece = response_text(response)
+                    if piece:
+                        parts.append(piece)
+                        if on_piece is not None:
+                            on_piece(piece)
+            else:
+                response = getattr(client, api)(**kwargs)
+                parts.append(response_text(response))
+        except lazy_import("httpx").TimeoutException as e:
+            raise RequestTimeoutException(f"Request to {backend.host} timed out after {self.request_timeout:.0f} s.") from e
+        if job is not None and job.cancelled.is_set():
+            raise RequestCancelledException()
+        return "".join(parts), response
+
+    def report_prompt_cache(self, job, api, kwargs, response):
+        if api == "chat":
+            system, user = kwargs["messages"][0]["content"], kwargs["messages"][-1]["content"]
+        else:
+            system, user = kwargs.get("system", ""), kwargs.get("prompt", "")
+        observed = self.prompt_cache.observe(kwargs.get("model"), system, user, response)
+        if observed is None:
+            return
+        count, duration, saved, saved_seconds = observed
+        message = f"Prompt eval: {count} tokens in {duration * 1000:.0f} ms"
+        if saved:
+            message += f", ~{saved} cached prefix tokens reused (~{saved_seconds * 1000:.0f} ms saved)"
+        logging.info(message + ".")
+        if job is not None:
+            job.add_stat("prefix_tokens_saved", saved)
+            job.add_stat("prefix_seconds_saved", saved_seconds)
+
+    def generate_text(self, clipboard_text, job=None, profile=None):
+        profile = profile or self.profile_for(job)
+        text, _ = self.request(job, **self.request_args(clipboard_text, profile))
+        return text.strip()
+
+    def improve_chunked(self, clipboard_text, on_token=None, job=None, profile=None):
+        chunks = split_text(clipboard_text, self.chunk_size)
+        logging.info(f"Improving {len(chunks)} chunks, {min(self.chunk_parallel, len(chunks))} at a time...")
+        return self.improve_pieces([(chunk, sep, None) for chunk, sep in chunks], "chunk", on_token, job, profile)
+
+    def improve_incremental(self, plan, on_token=None, job=None, profile=None):
+        """Improves only the paragraphs in `plan` without a remembered improvement and reuses the rest."""
+        changed = sum(improved is None for _, _, improved in plan)
+        logging.info(f"Re-improving {changed} of {len(plan)} paragraphs, reusing the rest.")
+        return self.improve_pieces(plan, "paragraph", on_token, job, profile)
+
+    def improve_pieces(self, pieces, kind, on_token=None, job=None, profile=None):
+        """
+        Improves the (text, separator, improved or None) pieces that have no improvement yet, `chunk_parallel` at a
+        time, and joins them in order. Returns the text and whether every piece was improved; pieces that fail keep
+        their original text.
+        """
+        truncated = []
+
+        def run(text):
+            if job is not None and job.cancelled.is_set():
+                return None
+            try:
+                return self.generate_text(text, job, profile) or None
+            except OutputTruncatedException as e:
+                logging.error(f"{e} Keeping original {kind}.")
+                truncated.append(text)
+            except RequestTimeoutException as e:
+                logging.error(f"{kind.capitalize()} timed out, keeping original {kind}:\n{e}")
+            except RequestCancelledException:
+                pass
             except Exception as e:
-                logging.warning(f"Notification failed:\n{e}")
+                logging.error(f"{kind.capitalize()} improvement failed, keeping original {kind}:\n{e}")
+            return None
+
+        parts = []
+        complete = True
+        with ThreadPoolExecutor(max_workers=self.chunk_parallel, thread_name_prefix=kind.capitalize()) as pool:
+            futures = [pool.submit(run, text) if improved is None else None for text, _, improved in pieces]
+            for future, (text, sep, improved) in zip(futures, pieces):
+                if future is not None:
+                    improved = future.result()
+                if job is not None and job.cancelled.is_set():
+                    for f in futures:
+                        if f is not None:
+                            f.cancel()
+                    raise RequestCancelledException()
+                if improved is None:
+                    improved, complete = text, False
+                parts.append(improved + sep)
+                if on_token is not None:
+                    on_token(improved + sep)
+        if truncated and (job is None or not job.speculative):
+            self.notify("OCliP", f"Output was cut off for {len(truncated)} of {len(pieces)} {kind}s, they keep their "
+                                 f"original text.", "truncated")
+        return "".join(parts).strip(), complete
+
+    def stream_text(self, clipboard_text, on_token=None, job=None, profile=None):
+        profile = profile or self.profile_for(job)
+        start = time.perf_counter()
+        first_token = None
+
+        def on_piece(piece):
+            nonlocal first_token
+            if first_token is None:
+                first_token = time.perf_counter() - start
+                logging.info(f"First token after {first_token * 1000:.0f} ms.")
+                if job is not None:
+                    job.stages["first_token"] = first_token
+            if on_token is not None:
+                on_token(piece)
+
+        text, _ = self.request(job, on_piece, stream=True, **self.request_args(clipboard_text, profile))
+        logging.info(f"Generation finished in {time.perf_counter() - start:.2f} s.")
+        return text.strip()
+    
+    def notify(self, title, message, key=None):
+        if self.notifications_enabled:
+            self.notifier.toast(title, message, key)
 
     def set_sys_prompt(self, prompt):
         self.sys_prompt = prompt
+        if self.cache is not None:
+            self.cache.set_scope(self.model_name, self.sys_prompt + self.sys_postfix)
         self.update_config()
     
 
+class SoundPlayer(QObject):
+    """Keeps the notification sound loaded in a media player on the Qt thread so it isn't decoded again per play."""
+
+    play = Signal()
+
+    def __init__(self, pth):
+        super().__init__()
+        multimedia = lazy_import("PySide6.QtMultimedia")
+        self.output = multimedia.QAudioOutput()
+        self.player = multimedia.QMediaPlayer()
+        self.player.setAudioOutput(self.output)
+        self.player.setSource(QUrl.fromLocalFile(pth))
+        # Emitting from other threads queues the call onto the thread that owns the player.
+        self.play.connect(self.replay)
+
+    @Slot()
+    def replay(self):
+        self.player.setPosition(0)
+        self.player.play()
+
+
+class Notifier:
+    """
+    Shows notifications and plays the notification sound on a single worker thread. Posting never blocks: a
+    notification that is still waiting is replaced by a newer one with the same key, and posts are dropped once
+    max_pending notifications are queued.
+    """
+
+    max_pending = 8
+
+    def __init__(self, app_name, app_icon, sound_pth, sound_player=None):
+        self.app_name = app_name
+        self.app_icon = app_icon
+        self.sound_pth = sound_pth
+        self.sound_player = sound_player
+        self.queue = queue.Queue(self.max_pending)
+        self.pending = {}
+        self.lock = threading.Lock()
+        threading.Thread(target=self.run, daemon=True, name="Notifier").start()
+
+    def toast(self, title, message, key=None):
+        self.post(("toast", key or title), (title, message))
+
+    def sound(self):
+        self.post(("sound", None), None)
+
+    def post(self, key, payload):
+        with self.lock:
+            if key not in self.pending:
+                try:
+                    self.queue.put_nowait(key)
+                except queue.Full:
+                    logging.info("Notification queue full, dropping notification.")
+                    return
+            self.pending[key] = payload
+
+    def run(self):
+        while True:
+            key = self.queue.get()
+            with self.lock:
+                payload = self.pending.pop(key)
+            try:
+                if key[0] == "toast":
+                    title, message = payload
+                    lazy_import("plyer").notification.notify(
+                        title=title,
+                        message=message,
+                        timeout=0.5,
+                        app_name=self.app_name,
+                        app_icon=self.app_icon,
+                        ticker='ticker',
+                        toast=True
+                    )
+                elif self.sound_player is not None:
+                    self.sound_player.play.emit()
+                else:
+                    lazy_import("playsound").playsound(self.sound_pth)
+            except Exception as e:
+                logging.warning(f"Notification failed:\n{e}")
+
+
+class ConfigStore:
+    """
+    Holds oclip.cfg in memory. Changed keys are written back after a short debounce by rewriting only their lines
+    into a temp file that then replaces the original, and edits made to the file by hand are picked up by polling
+    its modification time.
+    """
+
+    header = "### OCliP Configuration File"
+    version_key = "config_version"
+    version = "2"
+
+    def __init__(self, pth, debounce=0.5):
+        self.pth = Path(pth)
+        self.debounce = debounce
+        self.values = {}
+        self.comments = {}
+        self.dirty = set()
+        self.lock = threading.RLock()
+        self.timer = None
+        self.mtime = None
+        self.values = self.read()
+        if self.values.get(self.version_key) != self.version:
+            # Older files hold values verbatim. Rewriting every key once stores them escaped, so a literal \n in
+            # an existing prompt keeps its meaning.
+            self.dirty.update(self.values)
+            self.set(self.version_key, self.version, "Config file format version, don't edit.")
+
+    def read(self):
+        values = {}
+        try:
+            with open(self.pth, "r", encoding="utf-8") as f:
+                self.mtime = os.fstat(f.fileno()).st_mtime_ns
+                for line in f:
+                    if "=" in line and not line.startswith("#"):
+                        key, val = line.rstrip("\r\n").split("=", 1)
+                        values[key.strip()] = val
+        except FileNotFoundError:
+            self.mtime = None
+        except Exception as e:
+            logging.warning(f"Couldn't read config file:\n{e}")
+        if values.get(self.version_key) != self.version:
+            return values
+        return {key: unescape_config_value(val) for key, val in values.items()}
+
+    def get(self, key, default=None):
+        with self.lock:
+            return self.values.get(key, default)
+
+    def set(self, key, val, comment=None):
+        """Updates a key in memory and schedules a write. Returns whether the value changed."""
+        with self.lock:
+            if comment is not None:
+                self.comments[key] = comment
+            if self.values.get(key) == val and key in self.values:
+                return False
+            self.values[key] = val
+            self.dirty.add(key)
+            if self.timer is None:
+                self.timer = threading.Timer(self.debounce, self.flush)
+                self.timer.daemon = True
+                self.timer.start()
+            return True
+
+    def flush(self):
+        with self.lock:
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+            if not self.dirty:
+                return
+            pending = {key: self.values[key] for key in self.dirty}
+            self.dirty.clear()
+            try:
+                with open(self.pth, "r", encoding="utf-8") as f:
+                    lines = f.read().splitlines()
+            except FileNotFoundError:
+                lines = [self.header]
+
+            out = []
+            for line in lines:
+                key = line.split("=", 1)[0].strip() if "=" in line and not line.startswith("#") else None
+                if key in pending:
+                    out.append(f"{key}={escape_config_value(pending.pop(key))}")
+                else:
+                    out.append(line)
+            for key, val in pending.items():
+                if key in self.comments:
+                    out.append(f"# {self.comments[key]}")
+                out.append(f"{key}={escape_config_value(val)}")
+
+            tmp_pth = self.pth.with_name(self.pth.name + ".tmp")
+            try:
+                with open(tmp_pth, "w", encoding="utf-8") as f:
+                    f.write("\n".join(out) + "\n")
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_pth, self.pth)
+                self.mtime = self.pth.stat().st_mtime_ns
+            except Exception as e:
+                logging.error(f"Couldn't write config file:\n{e}")
+
+    def reload(self):
+        """Re-reads the file if it changed on disk. Returns the keys whose values changed."""
+        with self.lock:
+            try:
+                mtime = self.pth.stat().st_mtime_ns
+            except FileNotFoundError:
+                return set()
+            if mtime == self.mtime:
+                return set()
+            values = self.read()
+            # Unsaved in-app changes win over the file.
+            changed = {k for k in set(values) | set(self.values) if k not in self.dirty and values.get(k) != self.values.get(k)}
+            for key in changed:
+                if key in values:
+                    self.values[key] = values[key]
+                else:
+                    self.values.pop(key, None)
+            return changed
+
+    def watch(self, callback, stop_event, interval=1.0):
+        def run():
+            while not stop_event.wait(interval):
+                try:
+                    changed = self.reload()
+                    if changed:
+                        callback(changed)
+                except Exception as e:
+                    logging.warning(f"Couldn't reload config file:\n{e}")
+
+        threading.Thread(target=run, daemon=True, name="ConfigWatcher").start()
+
+
+class ResponseCache:
+    """LRU of improved text backed by one JSON file per entry, keyed on a hash of model, system prompt and input."""
+
+    def __init__(self, cache_dir, max_entries=256, max_age=7 * 24 * 3600.0):
+        self.cache_dir = Path(cache_dir)
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.load()
+
+    @staticmethod
+    def make_key(*parts):
+        h = hashlib.sha256()
+        for part in parts:
+            h.update(part.encode("utf-8"))
+            h.update(b"\0")
+        return h.hexdigest()
+
+    def load(self):
+        now = time.time()
+        loaded = []
+        for pth in self.cache_dir.glob("*.json"):
+            try:
+                with open(pth, "r", encoding="utf-8") as f:
+                    entry = json.load(f)
+                if now - entry["created"] > self.max_age:
+                    pth.unlink(missing_ok=True)
+                    continue
+                loaded.append((pth.stat().st_mtime, pth.stem, entry["created"], entry["response"]))
+            except Exception:
+                pth.unlink(missing_ok=True)
+        for _, key, created, response in sorted(loaded):
+            self.entries[key] = (created, response)
+        self.evict()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if time.time() - entry[0] > self.max_age:
+                self.drop(key)
+                return None
+            self.entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, key, response):
+        created = time.time()
+        with self.lock:
+            self.entries[key] = (created, response)
+            self.entries.move_to_end(key)
+            self.evict()
+        try:
+            with open(self.cache_dir / f"{key}.json", "w", encoding="utf-8") as f:
+                json.dump({"created": created, "response": response}, f)
+        except Exception as e:
+            logging.warning(f"Couldn't write cache entry:\n{e}")
+
+    def drop(self, key):
+        self.entries.pop(key, None)
+        (self.cache_dir / f"{key}.json").unlink(missing_ok=True)
+
+    def evict(self):
+        while len(self.entries) > self.max_entries:
+            key = next(iter(self.entries))
+            self.drop(key)
+
+    def clear(self):
+        with self.lock:
+            for key in list(self.entries):
+                self.drop(key)
+
+    def set_scope(self, model_name, system):
+        """Clears the cache if the model or system prompt differ from the ones it was filled with."""
+        scope = self.make_key(model_name, system)
+        scope_pth = self.cache_dir / "scope"
+        try:
+            current = scope_pth.read_text(encoding="utf-8").strip()
+        except OSError:
+            current = None
+        if current == scope:
+            return
+        if current is not None:
+            self.clear()
+            logging.info("Response cache invalidated.")
+        scope_pth.write_text(scope, encoding="utf-8")
+
+
+class Profile:
+    """A named model and system prompt pair, optionally bound to its own trigger hotkey."""
+
+    def __init__(self, name, model, prompt, hotkey=None, keep_alive="10m", warm=True, num_predict_ratio=None):
+        self.name = name
+        self.model = model
+        self.prompt = prompt
+        self.hotkey = hotkey
+        self.keep_alive = keep_alive
+        self.warm = warm
+        self.num_predict_ratio = num_predict_ratio
+
+    def request_keep_alive(self):
+        # Cold profiles unload their model as soon as the request finishes.
+        return self.keep_alive if self.warm else 0
+
+    def config_entries(self):
+        prefix = f"profile.{self.name}"
+        return [
+            (f"Profile '{self.name}' model.", f"{prefix}.model", self.model),
+            (f"Profile '{self.name}' system prompt.", f"{prefix}.prompt", self.prompt),
+            (f"Profile '{self.name}' trigger hotkey.", f"{prefix}.hotkey", self.hotkey or ""),
+            (f"Profile '{self.name}' keep_alive.", f"{prefix}.keep_alive", format_keep_alive(self.keep_alive)),
+            (f"Keep profile '{self.name}' loaded between requests (true/false).", f"{prefix}.warm", self.warm),
+            (f"Profile '{self.name}' output cap as a multiple of the input tokens (empty for num_predict_ratio).",
+             f"{prefix}.num_predict_ratio", "" if self.num_predict_ratio is None else self.num_predict_ratio),
+        ]
+
+
+class TriggerJob:
+    response_fields = ("total_duration", "load_duration", "prompt_eval_count", "prompt_eval_duration", "eval_count",
+                       "eval_duration")
+
+    def __init__(self, text=None, profile=None):
+        self.text = text
+        self.profile = profile
+        self.result = None
+        self.done = threading.Event()
+        self.created = time.perf_counter()
+        self.cancelled = threading.Event()
+        self.cancel_callbacks = []
+        self.lock = threading.Lock()
+        self.stages = {}
+        self.stats = {}
+        self.speculative = False
+
+    def mark(self, stage, start):
+        self.stages[stage] = self.stages.get(stage, 0.0) + time.perf_counter() - start
+
+    def add_stat(self, name, val):
+        with self.lock:
+            self.stats[name] = self.stats.get(name, 0) + val
+
+    def add_response(self, response):
+        """Accumulates Ollama's timing fields; chunked requests add up over every chunk."""
+        if response is None:
+            return
+        with self.lock:
+            for field in self.response_fields:
+                val = getattr(response, field, None) or 0
+                if field.endswith("_duration"):
+                    val /= 1e9
+                self.stats[field] = self.stats.get(field, 0) + val
+
+    def on_cancel(self, callback):
+        with self.lock:
+            if not self.cancelled.is_set():
+                self.cancel_callbacks.append(callback)
+                return
+        callback()
+
+    def cancel(self):
+        with self.lock:
+            self.cancelled.set()
+            callbacks, self.cancel_callbacks = self.cancel_callbacks, []
+        for callback in callbacks:
+            callback()
+
+
+class ModelRouter:
+    """
+    Picks the largest model from a small-to-large list whose predicted latency fits the budget. Predictions use
+    per-model prompt and generation throughput measured from Ollama's responses, plus the measured load time if the
+    model isn't loaded, and are scaled by the number of requests already running on that model.
+    """
+
+    default_prompt_rate = 200.0
+    default_eval_rate = 20.0
+    default_load = 5.0
+    smoothing = 0.3
+
+    def __init__(self, models, budget):
+        self.models = list(models)
+        self.budget = budget
+        self.prompt_rate = {}
+        self.eval_rate = {}
+        self.load_time = {}
+        self.outstanding = {}
+        self.lock = threading.Lock()
+
+    def begin(self, model):
+        with self.lock:
+            self.outstanding[model] = self.outstanding.get(model, 0) + 1
+
+    def end(self, model):
+        with self.lock:
+            self.outstanding[model] = max(self.outstanding.get(model, 1) - 1, 0)
+
+    def update(self, table, model, val):
+        table[model] = val if model not in table else (1 - self.smoothing) * table[model] + self.smoothing * val
+
+    def observe(self, model, response):
+        if response is None:
+            return
+        with self.lock:
+            for table, count_field, duration_field in (
+                    (self.prompt_rate, "prompt_eval_count", "prompt_eval_duration"),
+                    (self.eval_rate, "eval_count", "eval_duration")):
+                count = getattr(response, count_field, None) or 0
+                duration = (getattr(response, duration_field, None) or 0) / 1e9
+                if count and duration:
+                    self.update(table, model, count / duration)
+            load = (getattr(response, "load_duration", None) or 0) / 1e9
+            if load >= LatencyMetrics.cold_load_threshold:
+                self.update(self.load_time, model, load)
+
+    def predict(self, model, tokens, cold):
+        with self.lock:
+            seconds = tokens / self.prompt_rate.get(model, self.default_prompt_rate)
+            # Improvements are about as long as their input.
+            seconds += tokens / self.eval_rate.get(model, self.default_eval_rate)
+            seconds *= 1 + self.outstanding.get(model, 0)
+            if cold:
+                seconds += self.load_time.get(model, self.default_load)
+        return seconds
+
+    def choose(self, tokens, loaded):
+        # Configured names may omit the tag that ps() always reports.
+        loaded = {ModelManager.normalize(model) for model in loaded}
+        cold = {model: ModelManager.normalize(model) not in loaded for model in self.models}
+        predictions = [(model, self.predict(model, tokens, cold[model])) for model in self.models]
+        summary = ", ".join(
+            f"{model} {'cold ' if cold[model] else ''}{seconds:.1f} s" for model, seconds in predictions
+        )
+        for model, seconds in reversed(predictions):
+            if seconds <= self.budget:
+                return model, f"largest within {self.budget:.1f} s budget; {summary}"
+        model, _ = min(predictions, key=lambda p: p[1])
+        return model, f"nothing fits the {self.budget:.1f} s budget, using fastest; {summary}"
+
+
+class PromptCacheStats:
+    """
+    Estimates how many system prefix tokens Ollama's prompt cache skipped. The prefix size for a model and system
+    prompt is learned from requests where it was evaluated in full; later requests that evaluate fewer tokens than
+    prefix + input reused the difference.
+    """
+
+    def __init__(self):
+        self.prefix_tokens = {}
+        self.lock = threading.Lock()
+
+    def observe(self, model, system, user, response):
+        count = getattr(response, "prompt_eval_count", None) or 0
+        if not count:
+            return None
+        duration = (getattr(response, "prompt_eval_duration", None) or 0) / 1e9
+        user_tokens = estimate_tokens(user)
+        key = (model, system)
+        with self.lock:
+            prefix = max(self.prefix_tokens.get(key, 0), count - user_tokens)
+            self.prefix_tokens[key] = prefix
+        saved = max(prefix + user_tokens - count, 0)
+        return count, duration, saved, saved * duration / count
+
+
+class MemoryGovernor:
+    """
+    Samples system memory and the local Ollama server's footprint. Under pressure it takes one step per sample:
+    cap num_ctx, switch to the low memory profile, then unload the models this app uses. Once memory use drops well below
+    the high mark, the cap and the profile are restored. The profile switch is an in-memory override, so the
+    profile saved in oclip.cfg stays the one the user picked. While the models are unloaded, requests ask Ollama to
+    unload them again as soon as they finish.
+    """
+
+    recovery_margin = 10.0
+
+    def __init__(self, imp):
+        self.imp = imp
+        self.psutil = lazy_import("psutil")
+        self.level = 0
+
+    def start(self):
+        threading.Thread(target=self.run, daemon=True, name="MemoryGovernor").start()
+
+    def ollama_memory(self):
+        """Resident memory of the Ollama server and its model runners in bytes."""
+        total = 0
+        for proc in self.psutil.process_iter(["name", "memory_info"]):
+            name = (proc.info["name"] or "").lower()
+            if name.startswith("ollama") and proc.info["memory_info"] is not None:
+                total += proc.info["memory_info"].rss
+        return total
+
+    def run(self):
+        while not self.imp.stop_event.wait(self.imp.governor_interval):
+            try:
+                self.sample()
+            except Exception as e:
+                logging.warning(f"Memory governor sample failed:\n{e}")
+
+    def sample(self):
+        memory = self.psutil.virtual_memory()
+        local = any(is_local_host(b.host) for b in self.imp.pool.backends)
+        ollama = self.ollama_memory() if local else 0
+        self.imp.memory_status = (f"RAM {memory.percent:.0f}% of {memory.total / 2**30:.1f} GB, "
+                                  f"Ollama {ollama / 2**30:.1f} GB")
+        ollama_high = self.imp.ollama_memory_max > 0 and ollama > self.imp.ollama_memory_max * 2**20
+        if memory.percent >= self.imp.memory_critical:
+            self.unload(f"system memory at {memory.percent:.0f}%")
+        elif memory.percent >= self.imp.memory_high or ollama_high:
+            reason = f"system memory at {memory.percent:.0f}%" if not ollama_high \
+                else f"Ollama using {ollama / 2**20:.0f} MB"
+            self.relieve(reason)
+        elif self.level > 0 and memory.percent < self.imp.memory_high - self.recovery_margin:
+            self.restore(memory.percent)
+
+    def relieve(self, reason):
+        if self.level == 0:
+            self.level = 1
+            self.imp.num_ctx_limit = self.imp.num_ctx_min or 2048
+            logging.info(f"Memory pressure ({reason}): capping num_ctx at {self.imp.num_ctx_limit}.")
+        elif self.level == 1:
+            self.level = 2
+            name = self.imp.low_memory_profile
+            if name in self.imp.profiles and self.imp.active_profile != name:
+                logging.info(f"Memory pressure ({reason}): switching to profile '{name}'.")
+                self.imp.profile_override = name
+        else:
+            self.unload(reason)
+
+    def unload(self, reason):
+        if self.level >= 3:
+            return
+        if self.imp.current_job is not None:
+            # Unloading mid-request would only make Ollama load the model again.
+            return
+        self.level = 3
+        if self.imp.num_ctx_limit is None:
+            self.imp.num_ctx_limit = self.imp.num_ctx_min or 2048
+            logging.info(f"Memory pressure ({reason}): capping num_ctx at {self.imp.num_ctx_limit}.")
+        for backend in self.imp.pool.backends:
+            if not backend.healthy or not is_local_host(backend.host):
+                continue
+            # Models other tools loaded on a shared server are left alone.
+            own = {ModelManager.normalize(m) for m in self.imp.required_models() + [self.imp.serving_fallback] if m}
+            try:
+                loaded = [m.model for m in backend.client.ps().models if ModelManager.normalize(m.model) in own]
+            except Exception as e:
+                logging.warning(f"Couldn't list loaded models on {backend.host}:\n{e}")
+                continue
+            for model in loaded:
+                try:
+                    backend.client.generate(model=model, prompt="", keep_alive=0)
+                    logging.info(f"Memory pressure ({reason}): unloaded {model} on {backend.host}.")
+                except Exception as e:
+                    logging.warning(f"Couldn't unload {model} on {backend.host}:\n{e}")
+
+    def restore(self, percent):
+        self.level = 0
+        self.imp.num_ctx_limit = None
+        logging.info(f"Memory back to {percent:.0f}%: removed the num_ctx cap.")
+        if self.imp.profile_override is not None:
+            self.imp.profile_override = None
+            logging.info(f"Memory back to {percent:.0f}%: switching back to profile '{self.imp.active_profile}'.")
+
+
+class ModelManager:
+    """
+    Looks up which models a server already has before pulling, streams pull progress in bytes to the log and
+    makes concurrent pulls of the same model on the same server share one download.
+    """
+
+    progress_interval = 1.0
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pulls = {}
+
+    @staticmethod
+    def normalize(model):
+        return model if ":" in model.rsplit("/", 1)[-1] else model + ":latest"
+
+    def installed(self, backend):
+        try:
+            return {self.normalize(m.model) for m in backend.client.list().models}
+        except Exception as e:
+            logging.warning(f"Couldn't list models on {backend.host}:\n{e}")
+            return set()
+
+    def missing(self, backend, models):
+        installed = self.installed(backend)
+        return [model for model in models if not self.has_model(backend, model, installed)]
+
+    def has_model(self, backend, model, installed):
+        if self.normalize(model) in installed:
+            return True
+        # show() also resolves names that list() spells differently, like registry prefixes.
+        try:
+            backend.client.show(model)
+            return True
+        except Exception:
+            return False
+
+    def pull(self, backend, model):
+        key = (backend.host, self.normalize(model))
+        with self.lock:
+            done = self.pulls.get(key)
+            if done is None:
+                done = self.pulls[key] = threading.Event()
+                owner = True
+            else:
+                owner = False
+        if not owner:
+            logging.info(f"Waiting for the running pull of {model}.")
+            done.wait()
+            return
+        try:
+            self.stream_pull(backend, model)
+        finally:
+            with self.lock:
+                self.pulls.pop(key, None)
+            done.set()
+
+    def stream_pull(self, backend, model):
+        layers = {}
+        start = time.perf_counter()
+        baseline = None
+        last_report = 0.0
+        logging.info(f"Pulling {model} on {backend.host}...")
+        for progress in backend.client.pull(model, stream=True):
+            if progress.digest and progress.total:
+                layers[progress.digest] = (progress.completed or 0, progress.total)
+            now = time.perf_counter()
+            if now - last_report < self.progress_interval:
+                continue
+            last_report = now
+            completed = sum(c for c, _ in layers.values())
+            total = sum(t for _, t in layers.values())
+            if not total:
+                logging.info(f"Pulling {model}: {progress.status}")
+                continue
+            if baseline is None:
+                # Layers resumed from an earlier pull don't count towards the download rate.
+                baseline = (completed, now)
+            elapsed = now - baseline[1]
+            rate = (completed - baseline[0]) / elapsed if elapsed > 0 else 0
+            status = f"Pulling {model}: {completed / 2**20:.0f} MB of {total / 2**20:.0f} MB ({completed / total:.0%})"
+            if rate > 0:
+                eta = (total - completed) / rate
+                status += f" at {rate / 2**20:.1f} MB/s, ETA {int(eta // 60)}m {int(eta % 60):02d}s"
+            logging.info(status)
+        logging.info(f"Pulled {model} in {time.perf_counter() - start:.0f} s.")
+
+
+class SegmentMemory:
+    """
+    Remembers the paragraphs of recent inputs next to their improved versions. A new input is diffed against the
+    closest remembered one, and paragraphs that didn't change keep their earlier improvement.
+    """
+
+    def __init__(self, max_inputs=8):
+        self.inputs = deque(maxlen=max_inputs)
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def split(text):
+        pieces = re.split(r"(\n\s*\n)", text.strip())
+        return [(pieces[i], pieces[i + 1] if i + 1 < len(pieces) else "") for i in range(0, len(pieces), 2)]
+
+    def remember(self, scope, text, improved):
+        originals = [segment for segment, _ in self.split(text)]
+        improvements = [segment for segment, _ in self.split(improved)]
+        # Paragraphs can only be matched up when the model kept the paragraph structure.
+        if len(originals) < 2 or len(originals) != len(improvements):
+            return
+        with self.lock:
+            self.inputs.append((scope, originals, improvements))
+
+    def plan(self, scope, text, min_similarity=0.6):
+        """
+        Returns (segment, separator, improved or None) for every paragraph of `text`, or None if no remembered
+        input is at least `min_similarity` alike (difflib ratio over paragraphs). The threshold keeps unrelated
+        text that merely shares a greeting or signature from being improved paragraph by paragraph.
+        """
+        segments = self.split(text)
+        if len(segments) < 2:
+            return None
+        current = [segment for segment, _ in segments]
+        with self.lock:
+            candidates = [(o, i) for s, o, i in self.inputs if s == scope]
+        best, best_ratio = None, 0.0
+        for originals, improvements in candidates:
+            matcher = difflib.SequenceMatcher(None, originals, current, autojunk=False)
+            if matcher.ratio() > best_ratio:
+                best, best_ratio = (matcher, improvements), matcher.ratio()
+        if best is None or best_ratio < min_similarity:
+            return None
+        matcher, improvements = best
+        reused = [None] * len(current)
+        for a, b, size in matcher.get_matching_blocks():
+            reused[b:b + size] = improvements[a:a + size]
+        if all(r is None for r in reused):
+            return None
+        return [(segment, sep, r) for (segment, sep), r in zip(segments, reused)]
+
+
+class Speculator:
+    """
+    Improves copied text in the background so that a trigger for the same text finds the result in the response
+    cache. Only the newest copied text is kept, and a speculative request is cancelled as soon as a real request
+    for different text comes in.
+    """
+
+    def __init__(self, imp):
+        self.imp = imp
+        self.pending = None
+        self.job = None
+        self.lock = threading.Lock()
+        self.wake = threading.Event()
+        threading.Thread(target=self.run, daemon=True, name="Speculator").start()
+
+    def offer(self, text):
+        with self.lock:
+            self.pending = text
+            if self.job is not None and self.job.text != text:
+                self.job.cancel()
+        self.wake.set()
+
+    def claim(self, text, timeout=None):
+        """Called by a real request before it improves `text`; waits for a matching speculation to finish."""
+        with self.lock:
+            self.pending = None
+            job = self.job
+        if job is None:
+            return
+        if job.text == text:
+            logging.info("Waiting for speculative improvement of the same text.")
+            job.done.wait(timeout)
+        else:
+            job.cancel()
+
+    def run(self):
+        while not self.imp.stop_event.is_set():
+            self.wake.wait()
+            self.wake.clear()
+            with self.lock:
+                text, self.pending = self.pending, None
+            if text is None:
+                continue
+            cache = self.imp.cache
+            profile = self.imp.speculation_profile()
+            if cache is None:
+                continue
+            if cache.get(cache.make_key(profile.model, profile.prompt + self.imp.sys_postfix, text)) is not None:
+                continue
+            if not self.imp.is_idle():
+                logging.info("Skipping speculative improvement, busy.")
+                continue
+            job = TriggerJob(text, profile)
+            job.speculative = True
+            with self.lock:
+                if self.pending is not None:
+                    # Newer text was copied while checking; handle that instead.
+                    self.wake.set()
+                    continue
+                self.job = job
+            start = time.perf_counter()
+            try:
+                self.imp.improve_text(text, job=job)
+                logging.info(f"Speculatively improved copied text in {time.perf_counter() - start:.2f} s.")
+            except RequestCancelledException:
+                logging.info("Speculative improvement cancelled.")
+            except Exception as e:
+                logging.warning(f"Speculative improvement failed:\n{e}")
+            finally:
+                with self.lock:
+                    self.job = None
+                job.done.set()
+
+
+class HistoryStore:
+    """
+    Keeps (original, improved) pairs with the model, prompt and timings that produced them in SQLite. Records are
+    written by a background thread so improvements never wait on disk, and only the newest max_entries are kept.
+    Text search uses an FTS5 index when the SQLite build has it and falls back to LIKE otherwise.
+    """
+
+    columns = ("id", "created", "original", "improved", "model", "prompt", "total", "stats")
+
+    def __init__(self, db_pth, max_entries=1000):
+        self.db_pth = Path(db_pth)
+        self.max_entries = max_entries
+        self.queue = queue.Queue()
+        self.lock = threading.Lock()
+        self.conn = self.connect()
+        self.fts = self.create_schema(self.conn)
+        threading.Thread(target=self.run, daemon=True, name="HistoryWriter").start()
+
+    def connect(self):
+        conn = sqlite3.connect(self.db_pth, timeout=5, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    @staticmethod
+    def create_schema(conn):
+        with conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS history (id INTEGER PRIMARY KEY, created REAL, original TEXT, "
+                         "improved TEXT, model TEXT, prompt TEXT, total REAL, stats TEXT)")
+        try:
+            with conn:
+                conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS history_fts USING fts5(original, improved, "
+                             "content='history', content_rowid='id')")
+                conn.execute("CREATE TRIGGER IF NOT EXISTS history_ai AFTER INSERT ON history BEGIN "
+                             "INSERT INTO history_fts(rowid, original, improved) "
+                             "VALUES (new.id, new.original, new.improved); END")
+                conn.execute("CREATE TRIGGER IF NOT EXISTS history_ad AFTER DELETE ON history BEGIN "
+                             "INSERT INTO history_fts(history_fts, rowid, original, improved) "
+                             "VALUES ('delete', old.id, old.original, old.improved); END")
+            return True
+        except sqlite3.OperationalError as e:
+            logging.info(f"SQLite has no FTS5, history search falls back to LIKE:\n{e}")
+            return False
+
+    def add(self, original, improved, model, prompt, total=None, stats=None):
+        self.queue.put((time.time(), original, improved, model, prompt, total, json.dumps(stats or {})))
+
+    def run(self):
+        conn = self.connect()
+        while True:
+            records = [self.queue.get()]
+            while not self.queue.empty():
+                records.append(self.queue.get_nowait())
+            try:
+                with conn:
+                    conn.executemany("INSERT INTO history (created, original, improved, model, prompt, total, stats) "
+                                     "VALUES (?, ?, ?, ?, ?, ?, ?)", records)
+                    conn.execute("DELETE FROM history WHERE id <= (SELECT MAX(id) FROM history) - ?",
+                                 (self.max_entries,))
+            except Exception as e:
+                logging.warning(f"Couldn't write history:\n{e}")
+
+    def rows(self, sql, args=()):
+        with self.lock:
+            cursor = self.conn.execute(sql, args)
+            return [dict(zip(self.columns, row)) for row in cursor.fetchall()]
+
+    def recent(self, limit=10):
+        return self.rows(f"SELECT {', '.join(self.columns)} FROM history ORDER BY id DESC LIMIT ?", (limit,))
+
+    def get(self, entry_id):
+        rows = self.rows(f"SELECT {', '.join(self.columns)} FROM history WHERE id = ?", (entry_id,))
+        return rows[0] if rows else None
+
+    def latest(self):
+        rows = self.recent(1)
+        return rows[0] if rows else None
+
+    def search(self, query, limit=50):
+        terms = query.split()
+        if not terms:
+            return self.recent(limit)
+        columns = ", ".join(f"history.{c}" for c in self.columns)
+        if self.fts:
+            # Every word is quoted so punctuation in the query can't be read as FTS syntax; a trailing * makes
+            # each a prefix match.
+            match = " ".join('"' + t.replace('"', '""') + '"*' for t in terms)
+            return self.rows(f"SELECT {columns} FROM history_fts JOIN history ON history.id = history_fts.rowid "
+                             f"WHERE history_fts MATCH ? ORDER BY history.id DESC LIMIT ?", (match, limit))
+        where = " AND ".join("(original LIKE ? OR improved LIKE ?)" for _ in terms)
+        args = [arg for t in terms for arg in (f"%{t}%", f"%{t}%")]
+        return self.rows(f"SELECT {columns} FROM history WHERE {where} ORDER BY id DESC LIMIT ?", (*args, limit))
+
+
+class LatencyMetrics:
+    """Rolling per-stage latency percentiles over the last `window` requests, appended to a JSON-lines file."""
+
+    summary_stages = ("total", "capture", "first_token", "improve", "load_duration", "prompt_eval_duration",
+                      "eval_duration")
+    cold_load_threshold = 0.5
+
+    def __init__(self, metrics_pth, window=200):
+        self.metrics_pth = Path(metrics_pth)
+        self.window = window
+        self.samples = {}
+        self.lock = threading.Lock()
+        self.loads = 0
+        self.cold_loads = 0
+
+    def record_load(self, load_duration):
+        with self.lock:
+            self.loads += 1
+            if load_duration >= self.cold_load_threshold:
+                self.cold_loads += 1
+
+    def add(self, key, val):
+        if key not in self.samples:
+            self.samples[key] = deque(maxlen=self.window)
+        self.samples[key].append(val)
+
+    def record(self, job, model_name, chars):
+        stats = dict(job.stats)
+        eval_duration = stats.get("eval_duration", 0)
+        tokens_per_sec = stats.get("eval_count", 0) / eval_duration if eval_duration else None
+        cold = stats.get("load_duration", 0) >= self.cold_load_threshold
+        if "load_duration" in stats:
+            self.record_load(stats["load_duration"])
+        with self.lock:
+            for stage, val in job.stages.items():
+                self.add(stage, val)
+            for field in ("load_duration", "prompt_eval_duration", "eval_duration"):
+                if field in stats:
+                    self.add(field, stats[field])
+            if tokens_per_sec is not None:
+                self.add("tokens_per_sec", tokens_per_sec)
+        entry = {
+            "time": time.time(),
+            "model": model_name,
+            "chars": chars,
+            "cached": stats.pop("cached", False),
+            "cold_load": cold,
+            "stages": job.stages,
+            "tokens_per_sec": tokens_per_sec,
+            **stats,
+        }
+        try:
+            with open(self.metrics_pth, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+        except Exception as e:
+            logging.warning(f"Couldn't write metrics:\n{e}")
+
+    def percentiles(self, key, pcts=(50, 95, 99)):
+        with self.lock:
+            values = sorted(self.samples.get(key, ()))
+        if not values:
+            return None
+        return [values[min(len(values) - 1, max(0, -(-p * len(values) // 100) - 1))] for p in pcts]
+
+    def summary(self):
+        parts = []
+        for stage in self.summary_stages:
+            pct = self.percentiles(stage)
+            if pct is not None:
+                name = stage.removesuffix("_duration")
+                parts.append(f"{name} " + "/".join(f"{v * 1000:.0f}" for v in pct))
+        tps = self.percentiles("tokens_per_sec", (50,))
+        if tps is not None:
+            parts.append(f"{tps[0]:.1f} tok/s")
+        if self.loads:
+            parts.append(f"cold loads {self.cold_loads}/{self.loads}")
+        count = len(self.samples.get("total", ()))
+        return f"Latency p50/p95/p99 ms over {count} requests: " + ", ".join(parts)
+
+
+class OllamaBackend:
+    loaded_max_age = 10.0
+
+    def __init__(self, host, use_async=False, timeout=None):
+        ollama = lazy_import("ollama")
+        self.host = host
+        # Each client keeps its own pool of keep-alive HTTP connections to the server. Management calls (pulls,
+        # loading models) can legitimately take minutes, so only the request client has a timeout.
+        self.client = ollama.Client(host=host)
+        self.request_client = ollama.Client(host=host, timeout=timeout)
+        self.async_client = ollama.AsyncClient(host=host) if use_async else None
+        self.outstanding = 0
+        self.healthy = True
+        self.loaded = set()
+        self.loaded_time = None
+
+    def refresh_loaded(self, timeout=1.0):
+        loaded = list_loaded_models(self.host, timeout)
+        if loaded is not None:
+            self.loaded, self.loaded_time = loaded, time.monotonic()
+
+    def loaded_models(self):
+        """Models the server has in memory as of the last health check, refreshed here when that is too old."""
+        if self.loaded_time is None or time.monotonic() - self.loaded_time > self.loaded_max_age:
+            self.refresh_loaded(0.5)
+        return self.loaded
+
+
+class OllamaPool:
+    """A set of Ollama servers with background health checks and least-outstanding-requests selection."""
+
+    def __init__(self, hosts, use_async=False, timeout=None):
+        self.backends = [OllamaBackend(host, use_async, timeout) for host in dict.fromkeys(hosts)]
+        self.lock = threading.Lock()
+
+    def pick(self, exclude=()):
+        candidates = [b for b in self.backends if b.host not in exclude]
+        healthy = [b for b in candidates if b.healthy] or candidates
+        return min(healthy, key=lambda b: b.outstanding)
+
+    def peek(self):
+        """The server acquire() would pick right now."""
+        with self.lock:
+            return self.pick()
+
+    def acquire(self, exclude=()):
+        with self.lock:
+            backend = self.pick(exclude)
+            backend.outstanding += 1
+        return backend
+
+    def release(self, backend):
+        with self.lock:
+            backend.outstanding = max(backend.outstanding - 1, 0)
+
+    def mark_unhealthy(self, backend, error):
+        if backend.healthy:
+            logging.warning(f"Ollama server {backend.host} failed, taking it out of rotation:\n{error}")
+        backend.healthy = False
+
+    def check(self):
+        for backend in self.backends:
+            healthy = probe_ollama(backend.host, 1.0)
+            if healthy != backend.healthy:
+                logging.info(f"Ollama server {backend.host} is {'back up' if healthy else 'down'}.")
+            backend.healthy = healthy
+            if healthy:
+                backend.refresh_loaded()
+
+    def wait_ready(self, timeout):
+        deadline = time.perf_counter() + timeout
+        delay = 0.05
+        while True:
+            self.check()
+            if any(b.healthy for b in self.backends):
+                return True
+            if time.perf_counter() >= deadline:
+                return False
+            time.sleep(delay)
+            delay = min(delay * 2, 1.0)
+
+    def start_health_checks(self, interval, stop_event):
+        def run():
+            while not stop_event.wait(interval):
+                self.check()
+
+        if interval > 0:
+            threading.Thread(target=run, daemon=True, name="OllamaHealth").start()
+
+
+class AsyncEngine:
+    """Runs ollama.AsyncClient requests on a dedicated event loop thread so they can be cancelled and timed out."""
+
+    def __init__(self, timeout=60.0):
+        self.timeout = timeout
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(
+            target=self.loop.run_forever,
+            daemon=True,
+            name="AsyncEngine"
+        )
+        self.thread.start()
+
+    def generate(self, job=None, on_piece=None, api="generate", client=None, **kwargs):
+        future = asyncio.run_coroutine_threadsafe(self.run(client, on_piece, api, **kwargs), self.loop)
+        if job is not None:
+            job.on_cancel(future.cancel)
+        try:
+            return future.result()
+        except CancelledError:
+            raise RequestCancelledException()
+        except TimeoutError:
+            raise RequestTimeoutException(f"Request timed out after {self.timeout:.0f} s.")
+
+    async def run(self, client, on_piece=None, api="generate", **kwargs):
+        return await asyncio.wait_for(self.collect(client, on_piece, api, **kwargs), self.timeout)
+
+    async def collect(self, client, on_piece=None, api="generate", **kwargs):
+        call = getattr(client, api)
+        if not kwargs.get("stream"):
+            response = await call(**kwargs)
+            return response_text(response), response
+        parts = []
+        response = None
+        async for response in await call(**kwargs):
+            piece = response_text(response)
+            if piece:
+                parts.append(piece)
+                if on_piece is not None:
+                    on_piece(piece)
+        return "".join(parts), response
+
+    def stop(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
+
+class StreamTyper:
+    """Types streamed tokens into the focused window, trimming whitespace the same way str.strip() would.
+
+    Tokens arrive on the request thread or the asyncio loop, so they are queued and typed by a thread of its own
+    instead of blocking the stream on simulated keystrokes.
+    """
+
+    def __init__(self):
+        self.started = False
+        self.pending = ""
+        self.pieces = queue.Queue()
+        self.thread = None
+        self.typed = ""
+
+    def __call__(self, piece):
+        if not self.started:
+            piece = piece.lstrip()
+            if not piece:
+                return
+            self.started = True
+        text = self.pending + piece
+        body = text.rstrip()
+        self.pending = text[len(body):]
+        if body:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, daemon=True, name="StreamTyper")
+                self.thread.start()
+            self.pieces.put(body)
+
+    def run(self):
+        while (body := self.pieces.get()) is not None:
+            keyboard.write(body)
+            self.typed += body
+
+    def finish(self):
+        """Waits until everything queued so far has been typed."""
+        if self.thread is not None:
+            self.pieces.put(None)
+            self.thread.join()
+            self.thread = None
+
+    def undo(self):
+        """Erases what was typed, for streams that failed or were cancelled part way."""
+        for _ in range(len(self.typed)):
+            keyboard.send("backspace")
+        self.typed = ""
+
+
+class MockOllamaHandler(BaseHTTPRequestHandler):
+    """Answers the subset of the Ollama API OCliP uses by echoing the prompt back at a configurable rate."""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, body, status=200):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path == "/api/version":
+            self.send_json({"version": "0.0.0-mock"})
+        elif self.path == "/api/tags":
+            self.send_json({"models": [{"model": m, "name": m, "size": 0} for m in self.server.models]})
+        elif self.path == "/api/ps":
+            self.send_json({"models": [{"model": m, "name": m, "size": 0} for m in self.server.models]})
+        elif self.path == "/":
+            self.send_json("Ollama is running")
+        else:
+            self.send_json({"error": "not found"}, 404)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        stream = request.get("stream", True)
+        if self.path == "/api/generate":
+            self.respond(request.get("model"), request.get("prompt", ""), stream, False)
+        elif self.path == "/api/chat":
+            messages = request.get("messages") or [{}]
+            self.respond(request.get("model"), messages[-1].get("content", ""), stream, True)
+        elif self.path == "/api/pull":
+            statuses = ["pulling manifest", "verifying sha256 digest", "writing manifest", "success"]
+            if request.get("model") not in self.server.models:
+                self.server.models.append(request.get("model"))
+            if stream:
+                self.stream_lines({"status": status} for status in statuses)
+            else:
+                self.send_json({"status": "success"})
+        else:
+            self.send_json({"error": "not found"}, 404)
+
+    def respond(self, model, prompt, stream, chat):
+        start = time.perf_counter()
+        tokens = re.findall(r"\S+\s*", prompt) or [""]
+
+        def body(text, done):
+            data = {"model": model, "created_at": "1970-01-01T00:00:00Z", "done": done}
+            if chat:
+                data["message"] = {"role": "assistant", "content": text}
+            else:
+                data["response"] = text
+            if done:
+                elapsed = int((time.perf_counter() - start) * 1e9)
+                prompt_eval = int(self.server.latency * 1e9)
+                data.update({
+                    "done_reason": "stop",
+                    "total_duration": elapsed,
+                    "load_duration": 0,
+                    "prompt_eval_count": max(len(prompt) // 4, 1),
+                    "prompt_eval_duration": prompt_eval,
+                    "eval_count": len(tokens),
+                    "eval_duration": max(elapsed - prompt_eval, 1),
+                })
+            return data
+
+        def pieces():
+            time.sleep(self.server.latency)
+            for token in tokens:
+                if self.server.rate > 0:
+                    time.sleep(1 / self.server.rate)
+                yield body(token, False)
+            yield body("", True)
+
+        if stream:
+            self.stream_lines(pieces())
+        else:
+            for _ in pieces():
+                pass
+            self.send_json(body("".join(tokens), True))
+
+    def stream_lines(self, lines):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for line in lines:
+            data = json.dumps(line).encode("utf-8") + b"\n"
+            self.wfile.write(f"{len(data):X}\r\n".encode() + data + b"\r\n")
+            self.wfile.flush()
+        self.wfile.write(b"0\r\n\r\n")
+
+
+class MockOllamaServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, latency=0.05, rate=200.0, models=(), address=("127.0.0.1", 0)):
+        super().__init__(address, MockOllamaHandler)
+        self.latency = latency
+        self.rate = rate
+        self.models = list(models)
+
+    @property
+    def host(self):
+        return f"http://{self.server_address[0]}:{self.server_address[1]}"
+
+
 class OllamaNotFoundException(Exception):
     def __init__(self, *args):
         super().__init__(*args)
 
+class RequestCancelledException(Exception):
+    def __init__(self, *args):
+        super().__init__(*args)
+
+class RequestTimeoutException(RequestCancelledException):
+    def __init__(self, *args):
+        super().__init__(*args)
+
+class OutputTruncatedException(Exception):
+    def __init__(self, *args):
+        super().__init__(*args)
+
 def resource_path(relative_path):
         base_path = Path(getattr(sys, '_MEIPASS', Path.cwd()))
         return base_path / relative_path
 
+def split_text(text, max_chars):
+    """
+    Splits text into (chunk, separator) pairs of at most max_chars, preferring paragraph, then sentence,
+    then word boundaries. Joining chunk + separator for every pair gives back the stripped text.
+    """
+    units = []
+
+    def add(body, sep):
+        # Empty pieces (like the gap after a paragraph's last sentence) only carry whitespace, which belongs
+        # to the separator of the unit before them.
+        if body:
+            units.append([body, sep])
+        elif units:
+            units[-1][1] += sep
+
+    pieces = re.split(r"(\n\s*\n)", text.strip())
+    for i in range(0, len(pieces), 2):
+        paragraph = pieces[i]
+        paragraph_sep = pieces[i + 1] if i + 1 < len(pieces) else ""
+        if len(paragraph) <= max_chars:
+            add(paragraph, paragraph_sep)
+            continue
+        sentences = re.split(r"(?<=[.!?])(\s+)", paragraph)
+        for j in range(0, len(sentences), 2):
+            sentence = sentences[j]
+            sep = sentences[j + 1] if j + 1 < len(sentences) else paragraph_sep
+            while len(sentence) > max_chars:
+                # A space right at max_chars still leaves a first part of max_chars.
+                cut = sentence.rfind(" ", 0, max_chars + 1)
+                if cut <= 0:
+                    add(sentence[:max_chars], "")
+                    sentence = sentence[max_chars:]
+                else:
+                    add(sentence[:cut], " ")
+                    sentence = sentence[cut + 1:]
+            add(sentence, sep)
+
+    chunks = []
+    current, current_sep = "", ""
+    for body, sep in units:
+        if current and len(current) + len(current_sep) + len(body) > max_chars:
+            chunks.append((current, current_sep))
+            current, current_sep = body, sep
+        else:
+            current = current + current_sep + body if current else body
+            current_sep = sep
+    if current:
+        chunks.append((current, current_sep))
+    return chunks
+
+class StartupProfile:
+    """Collects import times and startup phase timestamps, measured from process start."""
+
+    def __init__(self, t0):
+        self.t0 = t0
+        self.imports = {}
+        self.phases = {}
+        self.lock = threading.Lock()
+        self.reported = False
+
+    def add_import(self, name, duration):
+        with self.lock:
+            self.imports[name] = duration
+
+    def mark(self, phase):
+        with self.lock:
+            self.phases.setdefault(phase, time.perf_counter() - self.t0)
+
+    def report(self):
+        with self.lock:
+            if self.reported:
+                return
+            self.reported = True
+            imports = ", ".join(f"{name} {val * 1000:.0f} ms" for name, val in self.imports.items())
+            phases = ", ".join(f"{name} at {val:.2f} s" for name, val in self.phases.items())
+        logging.info(f"Deferred imports: {imports or 'none'}")
+        logging.info(f"Startup phases: {phases}")
+
+
+startup = StartupProfile(STARTUP_T0)
+
+def lazy_import(name):
+    """Imports a module on first use and records how long the import took."""
+    module = sys.modules.get(name)
+    if module is None:
+        start = time.perf_counter()
+        module = importlib.import_module(name)
+        startup.add_import(name, time.perf_counter() - start)
+    return module
+
+def generation_options(text, system, num_predict_ratio, num_predict_min, num_ctx_min, num_ctx_max, num_ctx_limit=None,
+                       temperature=None, stop=()):
+    """
+    Generation options bounded by the input size. The output cap keeps a rambling model from holding the monitor,
+    and the context window only grows in powers of two because Ollama reloads the model whenever num_ctx changes.
+    The memory governor's num_ctx_limit lowers the ceiling, but only for text that fits under it; a smaller window
+    would silently cut off the input.
+    """
+    options = {}
+    input_tokens = estimate_tokens(text)
+    num_predict = None
+    if num_predict_ratio > 0:
+        num_predict = max(int(input_tokens * num_predict_ratio), num_predict_min)
+        options["num_predict"] = num_predict
+    needed = estimate_tokens(system) + input_tokens + (num_predict or input_tokens)
+    ceiling = num_ctx_max
+    if num_ctx_limit is not None and needed <= num_ctx_limit:
+        ceiling = min(num_ctx_max, num_ctx_limit)
+    if num_ctx_min > 0:
+        num_ctx = num_ctx_min
+        while num_ctx < needed and num_ctx < ceiling:
+            num_ctx *= 2
+        options["num_ctx"] = min(num_ctx, ceiling)
+    elif ceiling < num_ctx_max:
+        options["num_ctx"] = ceiling
+    if temperature is not None:
+        options["temperature"] = temperature
+    if stop:
+        options["stop"] = list(stop)
+    return options
+
+def estimate_tokens(text):
+    """
+    Rough token count: about four characters per token for ASCII text and one per character otherwise, which
+    errs high for scripts like Cyrillic but keeps CJK text from being underestimated.
+    """
+    ascii_chars = len(text.encode("ascii", "ignore"))
+    return -(-ascii_chars // 4) + len(text) - ascii_chars
+
+def response_text(response):
+    message = getattr(response, "message", None)
+    if message is not None:
+        return message.content or ""
+    return response.response or ""
+
+def file_sha256(pth, block_size=1024 * 1024):
+    h = hashlib.sha256()
+    with open(pth, "rb") as f:
+        while block := f.read(block_size):
+            h.update(block)
+    return h.hexdigest()
+
+def probe_ollama(host, timeout=0.5):
+    httpx = lazy_import("httpx")
+    try:
+        return httpx.get(f"{host}/api/version", timeout=timeout).status_code == 200
+    except httpx.HTTPError:
+        return False
+
+def list_loaded_models(host, timeout=1.0):
+    """Normalized names of the models a server has in memory, or None if it didn't answer in time."""
+    httpx = lazy_import("httpx")
+    try:
+        response = httpx.get(f"{host}/api/ps", timeout=timeout)
+        response.raise_for_status()
+        return {ModelManager.normalize(m.get("model") or m.get("name", "")) for m in response.json().get("models", [])}
+    except (httpx.HTTPError, ValueError):
+        return None
+
+def is_local_host(host):
+    name = host.split("://", 1)[-1].split("/", 1)[0].rsplit(":", 1)[0].strip("[]")
+    return name in ("127.0.0.1", "localhost", "::1")
+
+def normalize_host(host):
+    """Turns OLLAMA_HOST style values (e.g. 0.0.0.0:11434) into a URL a client can connect to."""
+    host = str(host).strip().rstrip("/")
+    if "://" not in host:
+        host = "http://" + host
+    scheme, rest = host.split("://", 1)
+    if rest.startswith("0.0.0.0"):
+        rest = "127.0.0.1" + rest[len("0.0.0.0"):]
+    if ":" not in rest.split("/", 1)[0].rsplit("]", 1)[-1]:
+        rest = rest + (":443" if scheme == "https" else ":11434")
+    return f"{scheme}://{rest}"
+
+def parse_keep_alive(val):
+    """Turns a keep_alive config value into what Ollama expects: seconds as a float, -1 for forever, or a duration."""
+    if isinstance(val, (int, float)):
+        return val
+    val = str(val).strip().lower()
+    if val in ("forever", "-1", "inf", "infinite"):
+        return -1
+    try:
+        return float(val)
+    except ValueError:
+        return val
+
+def format_keep_alive(val):
+    return "forever" if val == -1 else val
+
+def str_to_bool(val):
+    if isinstance(val, bool):
+        return val
+    return str(val).strip().lower() in ("1", "true", "yes", "on")
+
+def config_number(lines, key, current, kind=int, minimum=None):
+    """Parses a numeric config value, keeping `current` when the value is malformed so one typo can't stop the app."""
+    val = lines.get(key)
+    if val is None:
+        return current
+    try:
+        val = kind(val)
+    except (TypeError, ValueError):
+        logging.warning(f"Invalid {key} '{val}', keeping {current}.")
+        return current
+    return val if minimum is None else max(val, minimum)
+
+def format_config_value(val):
+    if isinstance(val, bool):
+        return str(val).lower()
+    return str(val)
+
+def escape_config_value(val):
+    return val.replace("\\", "\\\\").replace("\n", "\\n").replace("\r", "\\r")
+
+def unescape_config_value(val):
+    # Unknown escapes are kept as written so older single-line values read back unchanged.
+    return re.sub(r"\\(.)", lambda m: {"n": "\n", "r": "\r", "\\": "\\"}.get(m.group(1), m.group(0)), val)
+
+def run_benchmark(args):
+    """Drives improve_text and the monitor pipeline headlessly over a corpus and logs a latency report."""
+    corpus = Path(args.benchmark)
+    files = sorted(p for p in corpus.iterdir() if p.is_file()) if corpus.is_dir() else [corpus]
+    texts = [p.read_text(encoding="utf-8") for p in files] * args.bench_repeat
+    if not texts:
+        logging.critical(f"No benchmark texts found in {corpus}.")
+        return 1
+
+    # A scratch directory keeps the run away from the user's oclip.cfg, cache and history; their settings are copied in.
+    with tempfile.TemporaryDirectory(prefix="oclip-bench-", ignore_cleanup_errors=True) as config_dir:
+        user_config = Path("./oclip.cfg")
+        if user_config.is_file():
+            shutil.copyfile(user_config, Path(config_dir) / "oclip.cfg")
+        return benchmark_with(args, texts, config_dir)
+
+def benchmark_with(args, texts, config_dir):
+    server = None
+    host = args.bench_host
+    imp = ImproveClipboard(args.model, args.sys_prompt, None, False, None, None, config_dir)
+    if host is None:
+        server = MockOllamaServer(args.bench_latency, args.bench_rate, [imp.model_name])
+        threading.Thread(target=server.serve_forever, daemon=True, name="MockOllama").start()
+        host = server.host
+        logging.info(f"Mock Ollama server listening on {host}.")
+    imp.notifications_enabled = False
+    # Both passes send the same texts; the cache and paragraph memory would turn the second into lookups.
+    imp.cache = None
+    imp.incremental = False
+    imp.metrics = LatencyMetrics(Path("benchmark.jsonl").resolve(), len(texts))
+    imp.ollama_host = host
+    imp.connect([host])
+    imp.model_ready.set()
+
+    def report(name, jobs, wall):
+        latencies = sorted(job.stages.get("total", 0.0) for job in jobs)
+        overhead = sorted(
+            max(job.stages.get("improve", 0.0) - job.stats.get("total_duration", 0.0), 0.0) for job in jobs
+        )
+        chars = sum(len(job.text) for job in jobs)
+
+        def pct(values, p):
+            return values[min(len(values) - 1, max(0, -(-p * len(values) // 100) - 1))] * 1000
+
+        logging.info(
+            f"{name}: {len(jobs)} requests in {wall:.2f} s ({len(jobs) / wall:.1f} req/s, {chars / wall:.0f} chars/s), "
+            f"latency p50/p95/p99 {pct(latencies, 50):.1f}/{pct(latencies, 95):.1f}/{pct(latencies, 99):.1f} ms, "
+            f"client overhead p50/p95 {pct(overhead, 50):.1f}/{pct(overhead, 95):.1f} ms"
+        )
+
+    jobs = []
+    start = time.perf_counter()
+    for text in texts:
+        job = TriggerJob(text)
+        imp.process_headless_job(job)
+        jobs.append(job)
+    report("improve_text", jobs, time.perf_counter() - start)
+
+    imp.thread = imp.start_clipboard_monitor()
+    imp.thread.start()
+    jobs = []
+    start = time.perf_counter()
+    for text in texts:
+        job = TriggerJob(text)
+        imp.jobs.put(job)
+        job.done.wait()
+        jobs.append(job)
+    report("monitor pipeline", jobs, time.perf_counter() - start)
+    logging.info(imp.metrics.summary())
+
+    imp.jobs.put(None)
+    if imp.async_engine is not None:
+        imp.async_engine.stop()
+    if server is not None:
+        server.shutdown()
+    return 0
+
 if __name__ == "__main__":
 
     parser = argparse.ArgumentParser()
@@ -870,8 +3765,41 @@ if __name__ == "__main__":
                         action='store_true',
                         help='Force Ollama execution on the specified path.')
     
+    parser.add_argument('--benchmark',
+                        type=str,
+                        required=False,
+                        default=None,
+                        help='Run headless against a file or folder of text files and report latency, then exit.')
+
+    parser.add_argument('--bench-host',
+                        type=str,
+                        required=False,
+                        default=None,
+                        help='Ollama host to benchmark against. Defaults to a bundled mock server.')
+
+    parser.add_argument('--bench-latency',
+                        type=float,
+                        default=0.05,
+                        help='Mock server delay before the first token, in seconds.')
+
+    parser.add_argument('--bench-rate',
+                        type=float,
+                        default=200.0,
+                        help='Mock server streaming rate in tokens per second (0 for no delay).')
+
+    parser.add_argument('--bench-repeat',
+                        type=int,
+                        default=1,
+                        help='Number of passes over the benchmark corpus.')
+
     args = parser.parse_args()
 
+    startup.mark("imports")
+
+    if args.benchmark is not None:
+        ImproveClipboard.setLogger()
+        sys.exit(run_benchmark(args))
+
     app = QApplication(sys.argv)
 
     if platform.system() == "Windows":
@@ -885,4 +3813,5 @@ if __name__ == "__main__":
     window = OcliPWindow(args.model, args.sys_prompt, args.ollama_path, args.force_path, app_icon)
     window.resize(900, 400)
     window.show()
+    startup.mark("window shown")
     app.exec()
\ No newline at end of file
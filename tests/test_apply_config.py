@@ -0,0 +1,44 @@
+from impclip import ImproveClipboard
+
+
+def test_malformed_numbers_keep_current_values(tmp_path):
+    (tmp_path / "oclip.cfg").write_text("### OCliP Configuration File\nconfig_version=2\nchunk_size=abc\n"
+                                        "request_timeout=\nchunk_threshold=500\ntemperature=warm\n", encoding="utf-8")
+    imp = ImproveClipboard(None, None, None, False, None, None, tmp_path)
+    assert imp.chunk_size == ImproveClipboard.chunk_size
+    assert imp.request_timeout == ImproveClipboard.request_timeout
+    assert imp.chunk_threshold == 500
+    assert imp.temperature is None
+
+
+def test_reload_applies_valid_keys_around_a_bad_one(tmp_path):
+    imp = ImproveClipboard(None, None, None, False, None, None, tmp_path)
+    imp.apply_config({"chunk_size": "1500", "cache_max_entries": "lots", "latency_budget": "3.5"})
+    assert imp.chunk_size == 1500
+    assert imp.cache_max_entries == ImproveClipboard.cache_max_entries
+    assert imp.latency_budget == 3.5
+
+
+def test_server_settings_follow_the_environment(tmp_path, monkeypatch):
+    monkeypatch.delenv("OLLAMA_NUM_PARALLEL", raising=False)
+    monkeypatch.delenv("OLLAMA_HOST", raising=False)
+    imp = ImproveClipboard(None, None, None, False, None, None, tmp_path)
+    imp.config.flush()
+    assert imp.chunk_parallel == 2
+    assert imp.config.get("chunk_parallel") == "auto"
+    assert imp.config.get("ollama_host") == "auto"
+
+    monkeypatch.setenv("OLLAMA_NUM_PARALLEL", "8")
+    monkeypatch.setenv("OLLAMA_HOST", "0.0.0.0:11500")
+    imp = ImproveClipboard(None, None, None, False, None, None, tmp_path)
+    assert imp.chunk_parallel == 8
+    assert imp.ollama_host == "http://127.0.0.1:11500"
+
+
+def test_explicit_server_settings_win(tmp_path, monkeypatch):
+    monkeypatch.setenv("OLLAMA_NUM_PARALLEL", "8")
+    monkeypatch.setenv("OLLAMA_HOST", "0.0.0.0:11500")
+    imp = ImproveClipboard(None, None, None, False, None, None, tmp_path)
+    imp.apply_config({"chunk_parallel": "3", "ollama_host": "gpu-box"})
+    assert imp.chunk_parallel == 3
+    assert imp.ollama_host == "http://gpu-box:11434"
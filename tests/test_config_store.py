@@ -0,0 +1,47 @@
+from impclip import ConfigStore
+
+
+def test_round_trips_multiline_values(tmp_path):
+    pth = tmp_path / "oclip.cfg"
+    store = ConfigStore(pth)
+    store.set("sys_prompt", "Line one\nLine two \\n stays", "Prompt.")
+    store.flush()
+    assert "sys_prompt=Line one\\nLine two \\\\n stays\n" in pth.read_text(encoding="utf-8")
+    assert ConfigStore(pth).get("sys_prompt") == "Line one\nLine two \\n stays"
+
+
+def test_migrates_unversioned_files(tmp_path):
+    pth = tmp_path / "oclip.cfg"
+    pth.write_text("### OCliP Configuration File\n# Prompt.\nsys_prompt=Keep \\n literal\n", encoding="utf-8")
+    store = ConfigStore(pth)
+    assert store.get("sys_prompt") == "Keep \\n literal"
+    store.flush()
+    text = pth.read_text(encoding="utf-8")
+    assert "# Prompt.\nsys_prompt=Keep \\\\n literal\n" in text
+    assert f"{ConfigStore.version_key}={ConfigStore.version}" in text
+    assert ConfigStore(pth).get("sys_prompt") == "Keep \\n literal"
+
+
+def test_only_rewrites_changed_lines(tmp_path):
+    pth = tmp_path / "oclip.cfg"
+    store = ConfigStore(pth)
+    store.set("a", "1")
+    store.set("b", "2")
+    store.flush()
+    pth.write_text(pth.read_text(encoding="utf-8").replace("b=2", "# hand edit\nb=2"), encoding="utf-8")
+    store.reload()
+    store.set("a", "3")
+    store.flush()
+    lines = pth.read_text(encoding="utf-8").splitlines()
+    assert "a=3" in lines
+    assert lines[lines.index("b=2") - 1] == "# hand edit"
+
+
+def test_reload_picks_up_hand_edits(tmp_path):
+    pth = tmp_path / "oclip.cfg"
+    store = ConfigStore(pth)
+    store.set("a", "1")
+    store.flush()
+    pth.write_text(pth.read_text(encoding="utf-8").replace("a=1", "a=2"), encoding="utf-8")
+    assert store.reload() == {"a"}
+    assert store.get("a") == "2"
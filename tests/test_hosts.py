@@ -0,0 +1,27 @@
+import pytest
+
+from impclip import is_local_host, normalize_host
+
+
+@pytest.mark.parametrize("host, expected", [
+    ("localhost", "http://localhost:11434"),
+    ("0.0.0.0:11434", "http://127.0.0.1:11434"),
+    ("0.0.0.0", "http://127.0.0.1:11434"),
+    ("http://gpu-box:8080/", "http://gpu-box:8080"),
+    ("https://ollama.example.com", "https://ollama.example.com:443"),
+    ("http://[::1]", "http://[::1]:11434"),
+    ("  127.0.0.1:11500 ", "http://127.0.0.1:11500"),
+])
+def test_normalize_host(host, expected):
+    assert normalize_host(host) == expected
+
+
+@pytest.mark.parametrize("host, expected", [
+    ("http://127.0.0.1:11434", True),
+    ("http://localhost:11434", True),
+    ("http://[::1]:11434", True),
+    ("http://gpu-box:11434", False),
+    ("https://ollama.example.com:443", False),
+])
+def test_is_local_host(host, expected):
+    assert is_local_host(host) == expected
@@ -0,0 +1,106 @@
+from types import SimpleNamespace
+
+import pytest
+
+from impclip import ImproveClipboard, OutputTruncatedException, RequestTimeoutException
+
+TEXT = "One one.\n\nTwo two.\n\nThree."
+
+
+@pytest.fixture
+def imp(tmp_path):
+    imp = ImproveClipboard(None, None, None, False, None, None, tmp_path)
+    imp.chunk_threshold = 10
+    imp.chunk_size = 10
+    imp.stream_output = False
+    return imp
+
+
+def test_partial_chunk_results_are_not_kept(imp, monkeypatch):
+    calls = []
+
+    def generate_text(chunk, job=None, profile=None):
+        calls.append(chunk)
+        if chunk == "Two two.":
+            raise RequestTimeoutException("timed out")
+        return chunk.upper()
+
+    monkeypatch.setattr(imp, "generate_text", generate_text)
+    assert imp.improve_text(TEXT) == "ONE ONE.\n\nTwo two.\n\nTHREE."
+    assert imp.improve_text(TEXT) == "ONE ONE.\n\nTwo two.\n\nTHREE."
+    assert len(calls) == 6
+
+
+def test_complete_chunk_results_are_cached(imp, monkeypatch):
+    calls = []
+
+    def generate_text(chunk, job=None, profile=None):
+        calls.append(chunk)
+        return chunk.upper()
+
+    monkeypatch.setattr(imp, "generate_text", generate_text)
+    assert imp.improve_text(TEXT) == TEXT.upper()
+    assert imp.improve_text(TEXT) == TEXT.upper()
+    assert len(calls) == 3
+
+
+def test_failed_paragraphs_are_not_remembered(imp, monkeypatch):
+    imp.chunk_threshold = 0
+    imp.cache = None
+    calls = []
+
+    def generate_text(text, job=None, profile=None):
+        calls.append(text)
+        if text == "Two changed.":
+            raise RequestTimeoutException("timed out")
+        return text.upper()
+
+    monkeypatch.setattr(imp, "generate_text", generate_text)
+    assert imp.improve_text("One one.\n\nTwo two.\n\nThree.") == "ONE ONE.\n\nTWO TWO.\n\nTHREE."
+    changed = "One one.\n\nTwo changed.\n\nThree."
+    assert imp.improve_text(changed) == "ONE ONE.\n\nTwo changed.\n\nTHREE."
+    assert imp.improve_text(changed) == "ONE ONE.\n\nTwo changed.\n\nTHREE."
+    assert calls == ["One one.\n\nTwo two.\n\nThree.", "Two changed.", "Two changed."]
+
+
+def test_text_over_the_memory_cap_is_chunked(imp, monkeypatch):
+    imp.chunk_threshold = 0
+    imp.chunk_size = 2000
+    imp.num_ctx_limit = 2048
+    calls = []
+
+    def generate_text(text, job=None, profile=None):
+        calls.append(text)
+        return text
+
+    monkeypatch.setattr(imp, "generate_text", generate_text)
+    text = "\n\n".join(["word " * 300] * 4)
+    imp.improve_text(text)
+    assert len(calls) == 4
+    assert all(imp.request_options(c, "")["num_ctx"] <= 2048 for c in calls)
+
+
+def test_unloaded_models_are_not_kept_alive(imp):
+    profile = imp.default_profile()
+    assert imp.request_args("Fix this.", profile)["keep_alive"] == profile.keep_alive
+    imp.governor = SimpleNamespace(level=3)
+    assert imp.request_args("Fix this.", profile)["keep_alive"] == 0
+
+
+def test_truncation_toast_matches_the_path(imp, monkeypatch):
+    toasts = []
+    monkeypatch.setattr(imp, "notify", lambda title, message, key=None: toasts.append(message))
+
+    def generate_text(text, job=None, profile=None):
+        if text.startswith("Two"):
+            raise OutputTruncatedException("Output was cut off at 64 tokens.")
+        return text.upper()
+
+    monkeypatch.setattr(imp, "generate_text", generate_text)
+    assert imp.improve_text(TEXT) == "ONE ONE.\n\nTwo two.\n\nTHREE."
+    assert toasts == ["Output was cut off for 1 of 3 chunks, they keep their original text."]
+
+    imp.chunk_threshold = 0
+    imp.incremental = False
+    assert imp.improve_text("Two words.") == "Two words."
+    assert toasts[-1] == "Output was cut off at 64 tokens. Text left unchanged."
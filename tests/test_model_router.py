@@ -0,0 +1,37 @@
+from types import SimpleNamespace
+
+from impclip import ImproveClipboard, ModelRouter
+
+
+def test_picks_largest_model_within_budget():
+    router = ModelRouter(["small", "large"], 2.0)
+    router.observe("large", SimpleNamespace(prompt_eval_count=100, prompt_eval_duration=1e9, eval_count=10,
+                                            eval_duration=1e9, load_duration=0))
+    assert router.choose(10, {"small:latest"})[0] == "small"
+    assert router.choose(1, {"small:latest", "large:latest"})[0] == "large"
+
+
+def test_matches_loaded_models_without_tag():
+    router = ModelRouter(["gemma3", "gemma3:12b"], 1.0)
+    model, reason = router.choose(10, {"gemma3:latest"})
+    assert model == "gemma3"
+    assert "gemma3 cold" not in reason
+    assert "gemma3:12b cold" in reason
+
+
+def test_falls_back_to_fastest():
+    router = ModelRouter(["small", "large"], 0.001)
+    router.begin("small")
+    router.begin("small")
+    assert router.choose(100, {"small:latest", "large:latest"})[0] == "large"
+
+
+def test_route_uses_the_loaded_models_of_the_next_server(tmp_path):
+    imp = ImproveClipboard(None, None, None, False, None, None, tmp_path)
+    imp.router = ModelRouter(["small", "large"], 3.0)
+    cold = SimpleNamespace(loaded_models=lambda: set())
+    warm = SimpleNamespace(loaded_models=lambda: {"large:latest"})
+    imp.pool = SimpleNamespace(peek=lambda: cold)
+    assert imp.route(imp.default_profile(), "Fix this.").model == "small"
+    imp.pool = SimpleNamespace(peek=lambda: warm)
+    assert imp.route(imp.default_profile(), "Fix this.").model == "large"
@@ -0,0 +1,58 @@
+import pytest
+
+from impclip import ImproveClipboard, Profile, estimate_tokens, generation_options
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("", 0),
+    ("abcd", 1),
+    ("abcde", 2),
+    ("日本語のテキスト", 8),
+    ("abcd日本", 3),
+])
+def test_estimate_tokens(text, expected):
+    assert estimate_tokens(text) == expected
+
+
+def options(text, system="", num_predict_ratio=1.5, num_predict_min=64, num_ctx_min=2048, num_ctx_max=32768,
+            **kwargs):
+    return generation_options(text, system, num_predict_ratio, num_predict_min, num_ctx_min, num_ctx_max, **kwargs)
+
+
+def test_short_input_gets_the_minimum():
+    assert options("Fix this.") == {"num_predict": 64, "num_ctx": 2048}
+
+
+def test_context_grows_in_powers_of_two():
+    assert options("word " * 2000) == {"num_predict": 3750, "num_ctx": 8192}
+
+
+def test_context_is_capped():
+    assert options("x" * 400000)["num_ctx"] == 32768
+
+
+def test_memory_cap_never_cuts_off_input():
+    assert options("Fix this.", num_ctx_min=0, num_ctx_limit=2048)["num_ctx"] == 2048
+    assert options("Fix this.", num_ctx_limit=4096)["num_ctx"] == 2048
+    assert options("word " * 2000, num_ctx_limit=2048)["num_ctx"] == 8192
+
+
+def test_limits_can_be_disabled():
+    assert options("Fix this.", num_predict_ratio=0, num_ctx_min=0) == {}
+
+
+def test_passes_sampling_options():
+    result = options("Fix this.", temperature=0.2, stop=["\n\n"])
+    assert result["temperature"] == 0.2
+    assert result["stop"] == ["\n\n"]
+
+
+def test_profiles_can_override_the_ratio(tmp_path):
+    (tmp_path / "oclip.cfg").write_text("config_version=2\nprofile.translate.prompt=Translate.\n"
+                                        "profile.translate.num_predict_ratio=3\nprofile.fix.prompt=Fix.\n",
+                                        encoding="utf-8")
+    imp = ImproveClipboard(None, None, None, False, None, None, tmp_path)
+    text = "word " * 200
+    assert imp.request_options(text, "", imp.profiles["translate"])["num_predict"] == 750
+    assert imp.request_options(text, "", imp.profiles["fix"])["num_predict"] == 375
+    assert imp.request_options(text, "", Profile("x", "m", "p", num_predict_ratio=2.0))["num_predict"] == 500
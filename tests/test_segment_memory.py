@@ -0,0 +1,32 @@
+from impclip import SegmentMemory
+
+
+def test_reuses_unchanged_paragraphs():
+    memory = SegmentMemory()
+    memory.remember("scope", "One.\n\nTwo.\n\nThree.", "ONE.\n\nTWO.\n\nTHREE.")
+    plan = memory.plan("scope", "One.\n\nTwo changed.\n\nThree.")
+    assert plan == [("One.", "\n\n", "ONE."), ("Two changed.", "\n\n", None), ("Three.", "", "THREE.")]
+
+
+def test_needs_similar_input():
+    memory = SegmentMemory()
+    memory.remember("scope", "Hi,\n\nFirst topic.\n\nSecond topic.\n\nThanks", "Hello,\n\nA.\n\nB.\n\nThank you")
+    assert memory.plan("scope", "Hi,\n\nOther.\n\nUnrelated.\n\nText.\n\nThanks") is None
+
+
+def test_keeps_scopes_apart():
+    memory = SegmentMemory()
+    memory.remember("scope", "One.\n\nTwo.", "ONE.\n\nTWO.")
+    assert memory.plan("other", "One.\n\nTwo.") is None
+
+
+def test_skips_changed_paragraph_structure():
+    memory = SegmentMemory()
+    memory.remember("scope", "One.\n\nTwo.", "One and two.")
+    assert memory.plan("scope", "One.\n\nTwo.") is None
+
+
+def test_single_paragraph_has_no_plan():
+    memory = SegmentMemory()
+    memory.remember("scope", "One.\n\nTwo.", "ONE.\n\nTWO.")
+    assert memory.plan("scope", "One.") is None
@@ -0,0 +1,41 @@
+import random
+
+from impclip import split_text
+
+
+def joined(chunks):
+    return "".join(chunk + sep for chunk, sep in chunks)
+
+
+def random_text(rng):
+    words = ["a", "word", "longerword", "x" * 15, "end.", "why?", "wow!", "", " "]
+    seps = [" ", "  ", "\n", "\n\n", " \n\n", "\n \n", ". ", "! "]
+    return "".join(rng.choice(words) + rng.choice(seps) for _ in range(rng.randint(0, 30)))
+
+
+def test_round_trip():
+    rng = random.Random(0)
+    for _ in range(2000):
+        text = random_text(rng)
+        max_chars = rng.randint(1, 40)
+        chunks = split_text(text, max_chars)
+        assert joined(chunks) == text.strip(), (text, max_chars)
+        for chunk, _ in chunks:
+            assert 0 < len(chunk) <= max_chars, (text, max_chars)
+
+
+def test_keeps_paragraph_break_after_flushed_chunk():
+    chunks = split_text("Hello there. Bye now. \n\nNext para.", 8)
+    assert joined(chunks) == "Hello there. Bye now. \n\nNext para."
+
+
+def test_cuts_at_space_on_the_limit():
+    assert split_text("abcdefghij abcdefghij", 10) == [("abcdefghij", " "), ("abcdefghij", "")]
+
+
+def test_prefers_paragraphs():
+    assert split_text("One.\n\nTwo.", 6) == [("One.", "\n\n"), ("Two.", "")]
+
+
+def test_short_text_is_one_chunk():
+    assert split_text("  Short text.  ", 100) == [("Short text.", "")]